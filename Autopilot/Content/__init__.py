@@ -1,7 +1,11 @@
 from .abcs import *
 from .bom import *
+from .bom_engine import *
 from .door_ap import *
 from .dxf_utils import *
+from .engine import *
 from .hardware import *
 from .pieces import *
 from .postgre_client import *
+from .tracking import *
+from .uploader import *
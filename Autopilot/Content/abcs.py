@@ -3,10 +3,18 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+from Common import artifact_key
+
+from .dxf_utils import define_block, write_dxf
+from .tracking import ReadRecorder
+
 if TYPE_CHECKING:
     from collections.abc import Iterable
+    from typing import Any, BinaryIO, ClassVar
 
     from ezdxf.document import Drawing
+    from ezdxf.entities import Insert
+    from ezdxf.layouts import BaseLayout, BlockLayout
 
     from ._types import AnyBOMItem
     from .door_ap import APDoor
@@ -30,6 +38,8 @@ class DynamicBOMItem(BOMBase, ABC):
 
 
 class ImplementsBOM(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def bom(self) -> Iterable[AnyBOMItem]:
@@ -37,6 +47,9 @@ class ImplementsBOM(ABC):
 
 
 class Piece(ImplementsBOM, ABC):
+    # Door attributes this piece depends on; left as None, they are recorded while rendering
+    inputs: ClassVar[frozenset[str] | None] = None
+
     def __init__(self, door: APDoor, /):
         self.door: APDoor = door
 
@@ -44,6 +57,39 @@ class Piece(ImplementsBOM, ABC):
     def dxf(self) -> Drawing:
         pass
 
+    @classmethod
+    def manifest_key(cls) -> str:
+        return artifact_key({"manifest": f"{cls.__module__}.{cls.__qualname__}"})
+
+    @property
+    def params(self) -> dict[str, Any]:
+        # Whatever else the piece was constructed with, such as a side or a size
+        return {name: value for name, value in vars(self).items() if name != "door"}
+
+    def input_key(self, inputs: Iterable[str], /) -> str | None:
+        values = {name: getattr(self.door, name) for name in inputs}
+        piece = f"{type(self).__module__}.{type(self).__qualname__}"
+
+        try:
+            return artifact_key({"piece": piece, "params": self.params, "inputs": values})
+        except TypeError:
+            # The piece read something without a canonical form, so it is never cached
+            return None
+
+    def render(self, file: BinaryIO, /) -> frozenset[str]:
+        if self.inputs is not None:
+            write_dxf(self.dxf(), file)
+            return self.inputs
+
+        door, recorder = self.door, ReadRecorder(self.door)
+        self.door = recorder  # noqa
+
+        try:
+            write_dxf(self.dxf(), file)
+            return recorder.reads
+        finally:
+            self.door = door
+
 
 class Hardware(ImplementsBOM, ABC):
     @property
@@ -54,3 +100,21 @@ class Hardware(ImplementsBOM, ABC):
     @abstractmethod
     def edit_dxf(self, dxf: Drawing, /) -> None:
         pass
+
+    @property
+    def block_params(self) -> tuple[Any, ...]:
+        # Hardware with equal parameters shares a single block definition
+        return ()
+
+    @abstractmethod
+    def draw_block(self, block: BlockLayout, /) -> None:
+        pass
+
+    def insert_block(self, layout: BaseLayout, x: float, y: float, /, **kwargs: Any) -> Insert:
+        cls = type(self)
+
+        # Classes in different modules may share a name, so the qualified one is hashed too
+        params = (f"{cls.__module__}.{cls.__qualname__}", *self.block_params)
+        name = define_block(layout.doc, cls.__name__, params, self.draw_block)
+
+        return layout.add_blockref(name, (x, y), dxfattribs=kwargs)
@@ -5,14 +5,32 @@ from typing import TYPE_CHECKING
 from .abcs import BOMBase, DynamicBOMItem
 
 if TYPE_CHECKING:
-    ...
+    from typing import ClassVar
+
+    from Common import ItemCatalog
 
 
 __all__ = ("StaticBOMItem",)
 
 
 class StaticBOMItem(BOMBase):
-    def populate(self) -> None: ...
+    # Opened once per process; every process shares the same mapped pages
+    catalog: ClassVar[ItemCatalog | None] = None
+
+    def __init__(self, item_code: str, quantity: float, /):
+        super().__init__(item_code, quantity)
+        self.description: str | None = None
+        self.unit_cost: float | None = None
+        self.weight: float | None = None
+
+    def populate(self) -> None:
+        if self.catalog is None:
+            raise RuntimeError("No item catalog has been opened.")
+
+        item = self.catalog[self.item_code]
+        self.description = item.description
+        self.unit_cost = item.unit_cost
+        self.weight = item.weight
 
 
 # TODO: DynamicBOMItem subclasses
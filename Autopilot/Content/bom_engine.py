@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from csv import writer
+from typing import TYPE_CHECKING
+
+from numpy import array, bincount, flatnonzero, float64, int32, int64, repeat, unique
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import TextIO
+
+    from numpy.typing import NDArray
+
+    from ._types import AnyBOMItem
+    from .abcs import ImplementsBOM
+    from .door_ap import APDoor
+
+
+__all__ = ("BOMTable", "BOMEngine")
+
+
+class BOMTable:
+    __slots__ = ("codes", "items", "quantities", "doors")
+
+    def __init__(
+        self,
+        codes: tuple[str, ...],
+        items: NDArray,
+        quantities: NDArray,
+        doors: NDArray | None = None,
+        /,
+    ):
+        self.codes = codes
+        self.items = items
+        self.quantities = quantities
+        self.doors = doors
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def to_rows(self) -> list[tuple[str, float]] | list[tuple[int, str, float]]:
+        codes = self.codes
+        items = self.items.tolist()
+        quantities = self.quantities.tolist()
+
+        if self.doors is None:
+            return [(codes[i], q) for i, q in zip(items, quantities)]
+        else:
+            return [(d, codes[i], q) for d, i, q in zip(self.doors.tolist(), items, quantities)]
+
+    def to_json(self) -> dict[str, float]:
+        if self.doors is not None:
+            raise ValueError("Only a quote-wide table can be exported as JSON.")
+
+        return dict(self.to_rows())
+
+    def to_csv(self, file: TextIO, /) -> None:
+        header = (
+            ("item_code", "quantity")
+            if self.doors is None
+            else ("door", "item_code", "quantity")
+        )
+
+        csv = writer(file)
+        csv.writerow(header)
+        csv.writerows(self.to_rows())
+
+
+class BOMEngine:
+    __slots__ = ("__ids", "__codes", "__items", "__quantities", "__runs", "__columns")
+
+    def __init__(self):
+        self.__ids: dict[str, int] = {}
+        self.__codes: list[str] = []
+
+        # Rows are gathered into plain lists and only become arrays once, when first rolled up
+        self.__items: list[int] = []
+        self.__quantities: list[float] = []
+        self.__runs: list[tuple[int, int]] = []
+        self.__columns: tuple[NDArray, NDArray, NDArray] | None = None
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    @property
+    def codes(self) -> tuple[str, ...]:
+        return tuple(self.__codes)
+
+    def __intern__(self, item_code: str, /) -> int:
+        # Id 0 is falsy, so the fast path in add_items also lands here for the first code
+        item_id = self.__ids.get(item_code)
+
+        if item_id is None:
+            self.__ids[item_code] = item_id = len(self.__codes)
+            self.__codes.append(item_code)
+
+        return item_id
+
+    def __get_columns__(self) -> tuple[NDArray, NDArray, NDArray]:
+        if self.__columns is None:
+            doors, lengths = zip(*self.__runs) if self.__runs else ((), ())
+            self.__columns = (
+                array(self.__items, dtype=int32),
+                array(self.__quantities, dtype=float64),
+                repeat(array(doors, dtype=int32), lengths),
+            )
+
+        return self.__columns
+
+    def add_items(self, items: Iterable[AnyBOMItem], /, *, door: int) -> None:
+        items = tuple(items)
+        if not items:
+            return
+
+        ids, intern = self.__ids, self.__intern__
+        self.__items += [ids.get(item.item_code) or intern(item.item_code) for item in items]
+        self.__quantities += [item.quantity for item in items]
+        self.__runs.append((door, len(items)))
+        self.__columns = None
+
+    def add(self, source: ImplementsBOM, /, *, door: int) -> None:
+        self.add_items(source.bom, door=door)
+
+    def add_door(self, door: APDoor, index: int, /) -> None:
+        self.add(door, door=index)
+
+        for piece in door.pieces:
+            self.add(piece, door=index)
+
+    def add_quote(self, doors: Iterable[APDoor], /) -> None:
+        for index, door in enumerate(doors):
+            self.add_door(door, index)
+
+    def table(self) -> BOMTable:
+        items, quantities, doors = self.__get_columns__()
+        return BOMTable(self.codes, items, quantities, doors)
+
+    def rollup(self) -> BOMTable:
+        items, quantities, _ = self.__get_columns__()
+
+        # Item ids are dense, so a weighted bincount is a group-by-sum in a single pass
+        totals = bincount(items, weights=quantities, minlength=len(self.__codes))
+        present = flatnonzero(totals)
+
+        return BOMTable(self.codes, present, totals[present])
+
+    def rollup_by_door(self) -> BOMTable:
+        items, quantities, doors = self.__get_columns__()
+
+        width = len(self.__codes)
+        keys, inverse = unique(doors.astype(int64) * width + items, return_inverse=True)
+        totals = bincount(inverse, weights=quantities)
+
+        keep = totals != 0
+        keys = keys[keep]
+
+        return BOMTable(self.codes, keys % width, totals[keep], keys // width)
@@ -1,4 +1,3 @@
-__all__ = ("DXF_VERSION",)
-
+from Common import DXF_VERSION
 
-DXF_VERSION = "R2013"
+__all__ = ("DXF_VERSION",)
@@ -15,6 +15,8 @@ __all__ = ("APDoor",)
 
 
 class APDoor(Door, ImplementsBOM):
+    __slots__ = ()
+
     @property
     def pieces(self) -> tuple[Piece, ...]:
         # TODO: implement this
@@ -1,29 +1,184 @@
 from __future__ import annotations
 
+from hashlib import sha1
+from io import StringIO, TextIOWrapper
+from pickle import dumps, loads
+from shutil import copyfileobj
 from typing import TYPE_CHECKING
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
 
 from ezdxf import new
+from ezdxf.tools import guid
+from numpy import asarray, broadcast_to, float64, indices, stack, zeros
 
 from .constants import DXF_VERSION
 
 if TYPE_CHECKING:
-    from typing import Any
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+    from typing import Any, BinaryIO
 
-    from ezdxf.layouts import Modelspace
+    from ezdxf.document import Drawing
+    from ezdxf.layouts import BaseLayout, BlockLayout, Modelspace
+    from numpy.typing import ArrayLike
 
+    TemplateSetup = Callable[[Drawing], None]
+    BlockDrawer = Callable[[BlockLayout], None]
 
-__all__ = ("new_msp", "draw_rectangle")
+
+__all__ = (
+    "dxf_templates",
+    "dxf_template",
+    "invalidate_template",
+    "build_template",
+    "new_doc",
+    "new_msp",
+    "block_name",
+    "define_block",
+    "dxf_to_bytes",
+    "write_dxf",
+    "pack_dxfs",
+    "draw_rectangle",
+    "draw_rectangles",
+    "draw_circles",
+    "draw_hole_pattern",
+)
+
+
+dxf_templates: list[TemplateSetup] = []
+
+_template_cache: bytes | None = None
+
+
+def dxf_template(func: TemplateSetup, /) -> TemplateSetup:
+    dxf_templates.append(func)
+    invalidate_template()
+    return func
+
+
+def invalidate_template() -> None:
+    global _template_cache
+    _template_cache = None
+
+
+def build_template() -> Drawing:
+    # ezdxf's optional standard styles double every file, so only the defaults are kept
+    doc = new(DXF_VERSION)
+
+    for setup in dxf_templates:
+        setup(doc)
+
+    return doc
+
+
+def new_doc() -> Drawing:
+    global _template_cache
+
+    # Unpickling a copy of the template is cheaper than rebuilding its tables each time
+    if _template_cache is None:
+        _template_cache = dumps(build_template())
+
+    # Every copy is its own drawing, so none may share the template's fingerprint
+    doc = loads(_template_cache)
+    doc.header["$FINGERPRINTGUID"] = guid()
+    return doc
 
 
 def new_msp() -> Modelspace:
-    return new(DXF_VERSION).modelspace()
+    return new_doc().modelspace()
+
+
+def block_name(prefix: str, params: tuple[Any, ...], /) -> str:
+    digest = sha1(repr(params).encode()).hexdigest()[:16]
+    return f"{prefix}_{digest}"
+
+
+def define_block(
+    doc: Drawing, prefix: str, params: tuple[Any, ...], draw: BlockDrawer, /
+) -> str:
+    name = block_name(prefix, params)
+
+    # Identical parameters always hash to the same name, so each block is only drawn once
+    if name not in doc.blocks:
+        draw(doc.blocks.new(name=name))
+
+    return name
+
+
+def dxf_to_bytes(doc: Drawing, /) -> bytes:
+    stream = StringIO()
+    doc.write(stream)
+    return stream.getvalue().encode(doc.output_encoding)
+
+
+def write_dxf(doc: Drawing, file: BinaryIO, /) -> None:
+    # Encoded output goes straight to the file rather than being built up in memory first
+    stream = TextIOWrapper(file, encoding=doc.output_encoding, errors="dxfreplace", newline="")
+
+    try:
+        doc.write(stream)
+    finally:
+        stream.detach()
+
+
+def pack_dxfs(file: BinaryIO, members: Iterable[tuple[str, Path]], /) -> None:
+    with ZipFile(file, "w") as pack:
+        for name, path in members:
+            # A fixed timestamp keeps the pack a function of its members alone
+            info = ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = ZIP_DEFLATED
+
+            # Copied in blocks, so no DXF is ever held in memory whole
+            with path.open("rb") as source, pack.open(info, "w") as target:
+                copyfileobj(source, target)
 
 
 def draw_rectangle(
-    msp: Modelspace, x: float, y: float, w: float, h: float, **kwargs: Any
+    msp: BaseLayout, x: float, y: float, w: float, h: float, **kwargs: Any
 ) -> None:
     msp.add_lwpolyline(
         ((x, y), (x + w, y), (x + w, y + h), (x, y + h)),
         close=kwargs.pop("close", True),
         dxfattribs=kwargs,
     )
+
+
+def draw_rectangles(msp: BaseLayout, xy: ArrayLike, wh: ArrayLike, **kwargs: Any) -> None:
+    xy = asarray(xy, dtype=float64).reshape(-1, 2)
+    wh = broadcast_to(asarray(wh, dtype=float64), xy.shape)
+
+    # LWPOLYLINE vertices are stored as (x, y, start width, end width, bulge) rows
+    vertices = zeros((len(xy), 4, 5), dtype=float64)
+    vertices[:, :, :2] = xy[:, None]
+    vertices[:, 1:3, 0] += wh[:, None, 0]
+    vertices[:, 2:, 1] += wh[:, None, 1]
+
+    close = kwargs.pop("close", True)
+
+    # Assigning whole vertex arrays skips ezdxf's per-point parsing
+    for rectangle in vertices:
+        msp.add_lwpolyline((), close=close, dxfattribs=kwargs).lwpoints.set(rectangle)
+
+
+def draw_circles(msp: BaseLayout, centres: ArrayLike, radii: ArrayLike, **kwargs: Any) -> None:
+    centres = asarray(centres, dtype=float64).reshape(-1, 2)
+    radii = broadcast_to(asarray(radii, dtype=float64), centres.shape[:1])
+
+    for centre, radius in zip(centres.tolist(), radii.tolist()):
+        msp.add_circle(centre, radius, dxfattribs=kwargs)
+
+
+def draw_hole_pattern(
+    msp: BaseLayout,
+    x: float,
+    y: float,
+    rows: int,
+    cols: int,
+    pitch_x: float,
+    pitch_y: float,
+    radius: float,
+    **kwargs: Any,
+) -> None:
+    row, col = indices((rows, cols), dtype=float64).reshape(2, -1)
+    centres = stack((x + col * pitch_x, y + row * pitch_y), 1)
+    draw_circles(msp, centres, radius, **kwargs)
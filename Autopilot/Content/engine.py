@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+from asyncio import gather, get_running_loop, to_thread
+from concurrent.futures import ProcessPoolExecutor
+from json import dumps, loads
+from multiprocessing import get_context
+from os import cpu_count, link
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp, mkstemp
+from typing import TYPE_CHECKING
+
+from Common import ItemCatalog, log
+
+from .bom import StaticBOMItem
+from .dxf_utils import new_doc, pack_dxfs
+
+try:
+    from resource import RLIMIT_AS, setrlimit
+except ImportError:
+    RLIMIT_AS = setrlimit = None
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+    from typing import BinaryIO, Self
+
+    from Common import ArtifactCache, AutopilotEngineConfig
+
+    from .abcs import Piece
+    from .door_ap import APDoor
+    from .uploader import ArtifactUploader
+
+    RenderedPiece = tuple[Path, frozenset[str]]
+
+
+__all__ = ("pack_door", "render_pieces", "GenerationEngine")
+
+
+def _init_worker(max_memory: int, catalog: tuple[Path, float] | None, /) -> None:
+    # Building the template here pays ezdxf's start-up cost once per worker, not per task
+    new_doc()
+
+    if catalog is not None:
+        path, check_interval = catalog
+        StaticBOMItem.catalog = ItemCatalog(path, check_interval=check_interval)
+
+    if max_memory > 0 and setrlimit is not None:
+        limit = max_memory * 1024 * 1024
+        setrlimit(RLIMIT_AS, (limit, limit))
+
+
+def pack_door(file: BinaryIO, pieces: Sequence[Piece], paths: Sequence[Path], /) -> None:
+    # A door's artifact is a zip of its piece DXFs, in order
+    names = (f"{i:02d}_{type(piece).__name__}.dxf" for i, piece in enumerate(pieces, 1))
+    pack_dxfs(file, zip(names, paths))
+
+
+def render_pieces(pieces: Sequence[Piece], directory: Path, /) -> list[RenderedPiece]:
+    rendered = []
+
+    # Each DXF is written straight to disk, and only its path goes back to the engine
+    for piece in pieces:
+        fd, path = mkstemp(dir=directory, suffix=".dxf")
+        with open(fd, "wb") as file:
+            rendered.append((Path(path), piece.render(file)))
+
+    return rendered
+
+
+class GenerationEngine:
+    def __init__(
+        self,
+        *,
+        config: AutopilotEngineConfig,
+        cache: ArtifactCache | None = None,
+        catalog: ItemCatalog | None = None,
+        uploader: ArtifactUploader | None = None,
+    ):
+        self.config = config
+        self.cache = cache
+        self.catalog = catalog
+        self.uploader = uploader
+        self.__executor: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.shutdown()
+
+    @property
+    def workers(self) -> int:
+        return self.config.workers or cpu_count() or 1
+
+    @property
+    def is_running(self) -> bool:
+        return self.__executor is not None
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+
+        config = self.config
+        catalog = self.catalog
+
+        self.__executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                config.max_worker_memory,
+                None if catalog is None else (catalog.path, catalog.check_interval),
+            ),
+            max_tasks_per_child=config.max_tasks_per_worker or None,
+        )
+
+        # Submitting one no-op per worker forces every process to spawn and warm up now
+        list(self.__executor.map(int, range(self.workers)))
+
+        log(f"Generation engine started with {self.workers} worker(s).")
+
+    def shutdown(self) -> None:
+        if not self.is_running:
+            return
+
+        self.__executor.shutdown(cancel_futures=True)
+        self.__executor = None
+
+        log("Generation engine shut down.")
+
+    def chunks(self, pieces: Sequence[Piece], /) -> list[Sequence[Piece]]:
+        size = max(1, self.config.chunk_size)
+        return [pieces[i : i + size] for i in range(0, len(pieces), size)]
+
+    def piece_inputs(self, piece: Piece, /) -> frozenset[str] | None:
+        if piece.inputs is not None:
+            return piece.inputs
+        elif self.cache is None:
+            return None
+
+        # Manifests are bookkeeping, so they stay out of the hit rate
+        data = self.cache.get(piece.manifest_key(), track=False)
+        if data is None:
+            return None
+
+        # The directory may be shared, so anything that is not a list of names is ignored
+        try:
+            names = loads(data)
+        except ValueError:
+            return None
+
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            return None
+
+        return frozenset(names)
+
+    def workdir(self) -> Path:
+        # Inside the cache's staging area, so that rendered pieces can be renamed into place
+        return Path(mkdtemp(dir=None if self.cache is None else self.cache.staging))
+
+    def load_pieces(self, pieces: Sequence[Piece], directory: Path, /) -> list[Path | None]:
+        if self.cache is None:
+            return [None] * len(pieces)
+
+        results = []
+
+        for i, piece in enumerate(pieces):
+            inputs = self.piece_inputs(piece)
+            key = None if inputs is None else piece.input_key(inputs)
+
+            if key is None or not self.cache.touch(key):
+                results.append(None)
+                continue
+
+            # A hard link keeps the entry readable even if it is evicted before it is packed
+            path = directory / f"cached_{i}.dxf"
+            try:
+                link(self.cache.path_for(key), path)
+            except FileNotFoundError:
+                results.append(None)
+            else:
+                results.append(path)
+
+        return results
+
+    def store_pieces(
+        self, pieces: Sequence[Piece], rendered: Sequence[RenderedPiece], /
+    ) -> None:
+        if self.cache is None:
+            return
+
+        manifests = {}
+
+        for piece, (path, reads) in zip(pieces, rendered):
+            key = piece.input_key(reads)
+            if key is not None:
+                self.cache.put_file(key, path)
+            if piece.inputs is None:
+                manifests[piece.manifest_key()] = reads
+
+        for key, reads in manifests.items():
+            self.cache.put(key, dumps(sorted(reads)).encode())
+
+    def pack_doors(
+        self,
+        pending: Mapping[str, Sequence[Piece]],
+        outputs: Sequence[Path],
+        directory: Path,
+        /,
+    ) -> dict[str, Path]:
+        packs, start = {}, 0
+
+        for key, door_pieces in pending.items():
+            packs[key] = path = directory / f"{key}.zip"
+
+            with path.open("wb") as file:
+                pack_door(file, door_pieces, outputs[start : start + len(door_pieces)])
+
+            start += len(door_pieces)
+
+        return packs
+
+    async def generate(self, doors: Sequence[APDoor], directory: Path, /) -> dict[str, Path]:
+        if not self.is_running:
+            raise RuntimeError("Generation engine is not running.")
+
+        keys = [door.artifact_key for door in doors]
+
+        # Identical doors within the batch are only generated once
+        pending = {key: tuple(door.pieces) for key, door in zip(keys, doors)}
+
+        # Pieces whose inputs are unchanged since they were last rendered are reused
+        pieces = [piece for door_pieces in pending.values() for piece in door_pieces]
+        outputs = await to_thread(self.load_pieces, pieces, directory)
+        stale = [i for i, output in enumerate(outputs) if output is None]
+
+        loop = get_running_loop()
+        futures = (
+            loop.run_in_executor(self.__executor, render_pieces, chunk, directory)
+            for chunk in self.chunks([pieces[i] for i in stale])
+        )
+        rendered = [piece for chunk in await gather(*futures) for piece in chunk]
+
+        for i, (path, _) in zip(stale, rendered):
+            outputs[i] = path
+
+        # Only pieces are cached, so each door is stored once and its pack is rebuilt from them
+        packs = await to_thread(self.pack_doors, pending, outputs, directory)
+
+        # Storing moves rendered pieces out of the batch directory, so it has to come last
+        await to_thread(self.store_pieces, [pieces[i] for i in stale], rendered)
+
+        log(
+            f"Rendered {len(stale)} of {len(pieces)} piece(s) for a batch of {len(doors)} door(s)."
+        )
+
+        return packs
+
+    async def publish(self, doors: Sequence[APDoor], /, *, access: str) -> None:
+        if self.uploader is None:
+            raise RuntimeError("Generation engine has no uploader.")
+
+        directory = await to_thread(self.workdir)
+
+        # Packs are uploaded in chunks from disk, and the batch's files go however it ends
+        try:
+            packs = await self.generate(doors, directory)
+
+            for key, path in packs.items():
+                await self.uploader.upload(key, path, access=access)
+        finally:
+            await to_thread(rmtree, directory, ignore_errors=True)
@@ -2,8 +2,46 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from .abcs import Hardware
+from .dxf_utils import draw_circles
+
 if TYPE_CHECKING:
-    ...
+    from typing import Any
+
+    from ezdxf.document import Drawing
+    from ezdxf.layouts import BlockLayout
+
+    from .abcs import Piece
+    from .bom import StaticBOMItem
 
 
 __all__ = ()
+
+
+# TODO: Hardware subclasses
+
+
+class MyHardware(Hardware):
+    def __init__(self, x: float, y: float, /, *, radius: float = 17.5):
+        self.x: float = x
+        self.y: float = y
+        self.radius: float = radius
+
+    @property
+    def bom(self) -> tuple[StaticBOMItem, ...]:
+        return ()
+
+    @property
+    def pieces(self) -> tuple[Piece, ...]:
+        return ()
+
+    @property
+    def block_params(self) -> tuple[Any, ...]:
+        return (self.radius,)
+
+    def draw_block(self, block: BlockLayout, /) -> None:
+        block.add_circle((0, 0), self.radius)
+        draw_circles(block, ((-22.5, -9.5), (22.5, -9.5)), 2)
+
+    def edit_dxf(self, dxf: Drawing, /) -> None:
+        self.insert_block(dxf.modelspace(), self.x, self.y)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+__all__ = ("ReadRecorder",)
+
+
+class ReadRecorder:
+    __slots__ = ("__target", "__reads")
+
+    def __init__(self, target: Any, /):
+        self.__target = target
+        self.__reads: set[str] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        self.__reads.add(name)
+        return getattr(self.__target, name)
+
+    @property
+    def reads(self) -> frozenset[str]:
+        return frozenset(self.__reads)
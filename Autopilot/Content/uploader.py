@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from asyncio import to_thread
+from hashlib import sha256
+from typing import TYPE_CHECKING
+
+from Common import HTTPException, HTTPRoute, file_sha256, log
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from Common import HTTPClient
+
+
+__all__ = ("ArtifactUploader",)
+
+
+class ArtifactUploader:
+    def __init__(self, http: HTTPClient, /, *, chunk_size: int):
+        self.http = http
+        self.chunk_size = chunk_size
+
+    async def upload(self, key: str, path: Path, /, *, access: str) -> None:
+        route = HTTPRoute("/artifacts/{key}/upload", key=key)
+        headers = {"Authorization": f"Bearer {access}"}
+
+        size = path.stat().st_size
+        digest = await to_thread(file_sha256, path)
+
+        # Starting an upload that already exists resumes it from wherever the server got to
+        state = await self.http.post(
+            route, json={"size": size, "sha256": digest}, headers=headers
+        )
+        offset = state["offset"]
+
+        with path.open("rb") as file:
+            while offset < size:
+                file.seek(offset)
+                chunk = file.read(self.chunk_size)
+
+                chunk_headers = headers | {
+                    "Upload-Offset": str(offset),
+                    "Upload-Checksum": sha256(chunk).hexdigest(),
+                }
+
+                try:
+                    state = await self.http.patch(route, data=chunk, headers=chunk_headers)
+                except HTTPException as error:
+                    if error.response.status != 409:
+                        raise
+                    state = error.data
+
+                offset = state["offset"]
+
+        log(f"Uploaded artifact {key} ({size} bytes).")
@@ -1,12 +1,17 @@
+from .artifacts import *
 from .bases import *
+from .catalog import *
 from .company import *
 from .config import *
 from .door import *
+from .door_batch import *
 from .enums import *
 from .errors import *
 from .http_client import *
+from .options import *
 from .permissions import *
 from .postgre_client import *
+from .pricing import *
 from .quote import *
 from .resource import *
 from .route import *
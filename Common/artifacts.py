@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from enum import Enum
+from hashlib import sha256
+from json import dumps
+from os import fsync, replace, utime
+from pathlib import Path
+from tempfile import mkstemp
+from threading import Lock
+from time import time_ns
+from typing import TYPE_CHECKING
+
+from .utils import log
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from typing import Any
+
+    from .config import ArtifactCacheConfig
+
+__all__ = (
+    "DXF_VERSION",
+    "GENERATOR_VERSION",
+    "artifact_key",
+    "is_artifact_key",
+    "file_sha256",
+    "ArtifactCache",
+)
+
+
+DXF_VERSION = "R2013"
+
+# Bump this whenever a change to the Autopilot would alter the DXFs it generates
+GENERATOR_VERSION = 1
+
+
+def _encode(value: Any, /) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+
+    # Objects that know their own canonical configuration, such as doors
+    config = getattr(value, "config", None)
+    if config is not None:
+        return {"type": type(value).__qualname__, "config": config}
+
+    raise TypeError(f"{type(value).__name__} cannot be used in an artifact key.")
+
+
+def artifact_key(config: Mapping[str, Any], /) -> str:
+    canonical = dumps(
+        {"config": config, "generator": GENERATOR_VERSION, "dxf": DXF_VERSION},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_encode,
+    )
+    return sha256(canonical.encode()).hexdigest()
+
+
+def is_artifact_key(key: str, /) -> bool:
+    return len(key) == 64 and all(c in "0123456789abcdef" for c in key)
+
+
+def file_sha256(path: Path, /, *, chunk_size: int = 1024 * 1024) -> str:
+    digest = sha256()
+
+    with path.open("rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, *, config: ArtifactCacheConfig):
+        self.config = config
+        self.root = Path(__file__).parent.parent / config.path
+
+        # Engines use the cache from worker threads, so the index is only touched under the lock
+        self.__lock = Lock()
+        self.__index: OrderedDict[str, int] = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.__load_index__()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__index
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    @property
+    def max_size(self) -> int:
+        return self.config.max_size * 1024 * 1024
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.__hits + self.__misses
+        return self.__hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "count": len(self),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+    @property
+    def staging(self) -> Path:
+        # Inside the root so that finished files can be renamed into place
+        path = self.root / ".staging"
+        path.mkdir(exist_ok=True)
+        return path
+
+    def path_for(self, key: str, /) -> Path:
+        return self.root / key[:2] / key
+
+    def __load_index__(self) -> None:
+        # Access times double as recency, so the LRU order survives a restart
+        files = (path for path in self.root.glob("??/*") if not path.name.startswith("."))
+        stats = sorted(
+            ((path.stat(), path.name) for path in files), key=lambda s: s[0].st_atime
+        )
+
+        with self.__lock:
+            for stat, key in stats:
+                self.__index[key] = stat.st_size
+                self.__size += stat.st_size
+
+            self.__evict__()
+
+    def __forget__(self, key: str, /) -> None:
+        size = self.__index.pop(key, None)
+        if size is not None:
+            self.__size -= size
+
+    def __remember__(self, key: str, size: int, /) -> None:
+        self.__forget__(key)
+        self.__index[key] = size
+        self.__size += size
+
+    def __evict__(self) -> None:
+        while self.__size > self.max_size and self.__index:
+            key, size = self.__index.popitem(last=False)
+            self.__size -= size
+            self.path_for(key).unlink(missing_ok=True)
+            log(f"Evicted artifact {key}.")
+
+    def touch(self, key: str, /, *, track: bool = True) -> bool:
+        path = self.path_for(key)
+
+        # The directory may be shared with other processes, so the filesystem is the authority
+        try:
+            stat = path.stat()
+            # Only the access time moves, so modification times and ETags stay stable
+            utime(path, ns=(time_ns(), stat.st_mtime_ns))
+        except FileNotFoundError:
+            with self.__lock:
+                self.__forget__(key)
+                self.__misses += track
+            return False
+
+        with self.__lock:
+            self.__remember__(key, stat.st_size)
+            self.__hits += track
+        return True
+
+    def get(self, key: str, /, *, track: bool = True) -> bytes | None:
+        if not self.touch(key, track=track):
+            return None
+
+        try:
+            return self.path_for(key).read_bytes()
+        except FileNotFoundError:
+            # Evicted by another process between the two calls
+            with self.__lock:
+                self.__forget__(key)
+            return None
+
+    def put(self, key: str, data: bytes, /) -> None:
+        fd, temp = mkstemp(dir=self.staging)
+
+        try:
+            with open(fd, "wb") as file:
+                file.write(data)
+                file.flush()
+                fsync(file.fileno())
+            self.put_file(key, Path(temp))
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+
+    def put_file(self, key: str, source: Path, /) -> None:
+        path = self.path_for(key)
+        path.parent.mkdir(exist_ok=True)
+
+        # Readers only ever see complete files, as the rename is atomic
+        size = source.stat().st_size
+        replace(source, path)
+
+        with self.__lock:
+            self.__remember__(key, size)
+            self.__evict__()
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+from csv import DictReader
+from mmap import ACCESS_READ, mmap
+from os import fsync, replace, stat
+from pathlib import Path
+from struct import Struct
+from tempfile import mkstemp
+from time import monotonic, time_ns
+from typing import TYPE_CHECKING
+from zlib import crc32
+
+from .utils import log
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from typing import Any
+
+    from .config import CatalogConfig
+
+    CatalogRow = tuple[str, str, float, float]
+
+__all__ = ("CatalogItem", "read_catalog_csv", "write_catalog", "ItemCatalog")
+
+
+MAGIC = b"CATALOG\x00"
+FORMAT_VERSION = 1
+
+# magic, format, count, slots, reserved, build version, record offset, slot offset, heap offset
+HEADER = Struct("<8sIIIIQQQQ")
+# key offset, key length, description offset, description length, unit cost, weight
+RECORD = Struct("<IIIIdd")
+SLOT = Struct("<I")
+
+
+class CatalogItem:
+    __slots__ = ("item_code", "description", "unit_cost", "weight")
+
+    def __init__(self, item_code: str, description: str, unit_cost: float, weight: float, /):
+        self.item_code = item_code
+        self.description = description
+        self.unit_cost = unit_cost
+        self.weight = weight
+
+    def __repr__(self) -> str:
+        return f"<CatalogItem item_code={self.item_code!r}>"
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "item_code": self.item_code,
+            "description": self.description,
+            "unit_cost": self.unit_cost,
+            "weight": self.weight,
+        }
+
+
+def read_catalog_csv(path: Path, /) -> Iterator[CatalogRow]:
+    with path.open(newline="", encoding="utf-8") as file:
+        for row in DictReader(file):
+            yield (
+                row["item_code"],
+                row.get("description") or "",
+                float(row.get("unit_cost") or 0.0),
+                float(row.get("weight") or 0.0),
+            )
+
+
+def write_catalog(rows: Iterable[CatalogRow], path: Path, /) -> int:
+    entries = sorted(
+        ((code.encode(), description.encode(), float(cost), float(weight)))
+        for code, description, cost, weight in rows
+    )
+
+    for previous, current in zip(entries, entries[1:]):
+        if previous[0] == current[0]:
+            raise ValueError(f"Duplicate item code {current[0].decode()!r} in catalog.")
+
+    count = len(entries)
+    slots = 1 << max(1, (count * 2 - 1).bit_length())
+
+    heap, records, table = bytearray(), bytearray(), [0] * slots
+    for index, (code, description, cost, weight) in enumerate(entries):
+        records += RECORD.pack(
+            len(heap), len(code), len(heap) + len(code), len(description), cost, weight
+        )
+        heap += code + description
+
+        # Linear probing; slots hold the record index plus one so that zero means empty
+        slot = crc32(code) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = index + 1
+
+    version = time_ns()
+    record_offset = HEADER.size
+    slot_offset = record_offset + len(records)
+    heap_offset = slot_offset + slots * SLOT.size
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = mkstemp(dir=path.parent, prefix=f".{path.name}.")
+
+    try:
+        with open(fd, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    count,
+                    slots,
+                    0,
+                    version,
+                    record_offset,
+                    slot_offset,
+                    heap_offset,
+                )
+            )
+            file.write(records)
+            file.write(b"".join(map(SLOT.pack, table)))
+            file.write(heap)
+            file.flush()
+            fsync(file.fileno())
+
+        # Readers keep their existing mapping, so swapping in a new version is a single rename
+        replace(temp, path)
+    except BaseException:
+        Path(temp).unlink(missing_ok=True)
+        raise
+
+    log(f"Wrote catalog version {version} with {count} item(s) to {path.name}.")
+    return version
+
+
+class _CatalogMap:
+    __slots__ = ("identity", "buffer", "count", "slots", "version", "records", "table", "heap")
+
+    def __init__(self, path: Path, /):
+        with path.open("rb") as file:
+            info = stat(file.fileno())
+            self.buffer = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        self.identity = (info.st_dev, info.st_ino)
+
+        magic, fmt, self.count, self.slots, _, self.version, *offsets = HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path.name} is not a version {FORMAT_VERSION} item catalog.")
+
+        self.records, self.table, self.heap = offsets
+
+    def key(self, index: int, /) -> bytes:
+        offset, length = RECORD.unpack_from(self.buffer, self.records + index * RECORD.size)[:2]
+        start = self.heap + offset
+        return self.buffer[start : start + length]
+
+    def item(self, index: int, /) -> CatalogItem:
+        key_offset, key_length, description_offset, description_length, cost, weight = (
+            RECORD.unpack_from(self.buffer, self.records + index * RECORD.size)
+        )
+        key = self.heap + key_offset
+        description = self.heap + description_offset
+
+        return CatalogItem(
+            self.buffer[key : key + key_length].decode(),
+            self.buffer[description : description + description_length].decode(),
+            cost,
+            weight,
+        )
+
+    def find(self, code: bytes, /) -> int | None:
+        mask = self.slots - 1
+        slot = crc32(code) & mask
+
+        while True:
+            (entry,) = SLOT.unpack_from(self.buffer, self.table + slot * SLOT.size)
+            if not entry:
+                return None
+            elif self.key(entry - 1) == code:
+                return entry - 1
+
+            slot = (slot + 1) & mask
+
+    def bisect(self, code: bytes, /) -> int:
+        low, high = 0, self.count
+
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < code:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+
+class ItemCatalog:
+    __slots__ = ("path", "check_interval", "__map", "__next_check")
+
+    def __init__(self, path: Path, /, *, check_interval: float = 0.0):
+        self.path = path
+        self.check_interval = check_interval
+
+        # Only the header is read here; records are paged in by the OS as they are looked up
+        self.__map = _CatalogMap(path)
+        self.__next_check = monotonic() + check_interval
+
+    @classmethod
+    def from_config(cls, config: CatalogConfig, /) -> ItemCatalog:
+        path = Path(__file__).parent.parent / config.path
+        return cls(path, check_interval=config.check_interval)
+
+    def __len__(self) -> int:
+        return self.__map.count
+
+    def __contains__(self, item_code: str) -> bool:
+        return self.get(item_code) is not None
+
+    def __getitem__(self, item_code: str) -> CatalogItem:
+        item = self.get(item_code)
+        if item is None:
+            raise KeyError(item_code)
+        return item
+
+    def __iter__(self) -> Iterator[CatalogItem]:
+        catalog = self.__map
+        return (catalog.item(index) for index in range(catalog.count))
+
+    @property
+    def version(self) -> int:
+        return self.__map.version
+
+    def refresh(self) -> bool:
+        self.__next_check = monotonic() + self.check_interval
+
+        try:
+            info = stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        if (info.st_dev, info.st_ino) == self.__map.identity:
+            return False
+
+        # The old mapping is released once nothing references it any more
+        self.__map = _CatalogMap(self.path)
+        log(f"Loaded catalog version {self.version} from {self.path.name}.")
+        return True
+
+    def get(self, item_code: str, /) -> CatalogItem | None:
+        if self.check_interval and monotonic() >= self.__next_check:
+            self.refresh()
+
+        catalog = self.__map
+        index = catalog.find(item_code.encode())
+        return None if index is None else catalog.item(index)
+
+    def prefixed(self, prefix: str, /) -> Iterator[CatalogItem]:
+        catalog = self.__map
+        encoded = prefix.encode()
+
+        index = catalog.bisect(encoded)
+        while index < catalog.count and catalog.key(index).startswith(encoded):
+            yield catalog.item(index)
+            index += 1
@@ -9,7 +9,11 @@ if TYPE_CHECKING:
     from typing import Any
 
 __all__ = (
+    "ArtifactCacheConfig",
+    "AutopilotEngineConfig",
+    "CatalogConfig",
     "ClientAPIConfig",
+    "ConfiguratorConfig",
     "HTTPRetryConfig",
     "PostgresConfig",
     "ServerAPIConfig",
@@ -17,6 +21,26 @@ __all__ = (
 )
 
 
+@dataclass(kw_only=True, frozen=True)
+class ArtifactCacheConfig:
+    path: str
+    max_size: int
+
+
+@dataclass(kw_only=True, frozen=True)
+class AutopilotEngineConfig:
+    workers: int
+    max_tasks_per_worker: int
+    max_worker_memory: int
+    chunk_size: int
+
+
+@dataclass(kw_only=True, frozen=True)
+class CatalogConfig:
+    path: str
+    check_interval: float
+
+
 @dataclass(kw_only=True, frozen=True)
 class ClientAPIConfig:
     domain: str
@@ -26,6 +50,15 @@ class ClientAPIConfig:
     port: int
 
 
+@dataclass(kw_only=True, frozen=True)
+class ConfiguratorConfig:
+    so_x_min: float
+    so_x_max: float
+    so_y_min: float
+    so_y_max: float
+    step: float
+
+
 @dataclass(kw_only=True, frozen=True)
 class HTTPRetryConfig:
     max_retries: int
@@ -58,11 +91,30 @@ class ServerAPIConfig:
     refresh_time: float
     max_tokens_per_user: int
     task_interval: float
+    task_batch_size: int
+    task_max_attempts: int
+    task_lease: float
+    task_speculation_samples: int
     ws_heartbeat: float
+    ws_heartbeat_timeout: float
+    ws_heartbeat_slots: int
     ws_max_message_size: int
     ws_message_limit: int
     ws_message_interval: float
+    ws_event_byte_rate: float
+    ws_event_byte_burst: float
+    ws_ack_byte_rate: float
+    ws_ack_byte_burst: float
+    ws_compress: bool
+    ws_compress_threshold: int
+    ws_compress_takeover: bool
+    ws_dispatch_limit: int
+    ws_send_queue_size: int
+    ws_slow_consumer_policy: str
+    ws_replay_size: int
     resource_grace: float
+    upload_chunk_size: int
+    upload_grace: float
 
 
 config_file = Path(__file__).parent.parent / "config.toml"
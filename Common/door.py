@@ -1,20 +1,62 @@
 from __future__ import annotations
 
+from functools import cache
 from typing import TYPE_CHECKING
 
+from .artifacts import artifact_key
 from .bases import ComparesIDFormattedABC, ComparesIDFormattedMixin
 from .enums import DoorType
 from .errors import ValidationError
-from .rules import door_rules
+from .rules import door_rule_reads, door_rules
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
     from typing import Any
 
+    from .rules import DoorRule
+
 __all__ = ("Door",)
 
 
+# The stored state every other dimension is derived from
+DOOR_FIELDS = frozenset(("type", "so_x", "so_y", "leaf_split"))
+
+RULE_STATE = (
+    "__dirty",
+    "__reads",
+    "__failures",
+    "__rule_reads",
+    "__dependents",
+    "__rule_count",
+)
+
+# Memoised dimensions, cleared whenever a stored field is written
+DERIVED_STATE = ("__frame_x", "__frame_y", "__leaf_sum_x", "__leaf_y")
+
+
+@cache
+def _fields_of(name: str, /) -> frozenset[str]:
+    if name in DOOR_FIELDS:
+        return frozenset((name,))
+    elif not isinstance(getattr(Door, name, None), property):
+        raise ValueError(f"Door has no attribute {name!r} for a rule to read.")
+
+    # Derived attributes are resolved by reading them off one door of each type
+    return frozenset().union(*(Door(type=door_type).reads(name) for door_type in DoorType))
+
+
+@cache
+def _fields_for(names: frozenset[str], /) -> frozenset[str]:
+    return frozenset().union(*map(_fields_of, names))
+
+
 class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
+    __slots__ = ("__type", "__so_x", "__so_y", "__leaf_split", *DERIVED_STATE, *RULE_STATE)
+
     def __init__(self, **kwargs: Any):
+        self.__reset_rules__()
+        self.__reset_derived__()
+
         self.__type = DoorType(kwargs.get("type", DoorType.Single))
 
         self.__so_x: float = kwargs.get("so_x", 1000)
@@ -29,13 +71,49 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
     @property
     def formatted_id(self) -> str: ...
 
+    def __getstate__(self) -> tuple[Any, ...]:
+        # Derived values and rule results are only caches, and rules need not be picklable
+        return self.__type, self.__so_x, self.__so_y, self.__leaf_split
+
+    def __setstate__(self, state: tuple[Any, ...]) -> None:
+        self.__type, self.__so_x, self.__so_y, self.__leaf_split = state
+        self.__reset_rules__()
+        self.__reset_derived__()
+
+    def __reset_rules__(self) -> None:
+        # Rule state is only allocated by the first validation, so idle doors stay small
+        self.__dirty: set[str] | None = None
+        self.__reads: set[str] | None = None
+        self.__failures: dict[DoorRule, str] | None = None
+        self.__rule_reads: dict[DoorRule, frozenset[str]] | None = None
+        self.__dependents: dict[str, set[DoorRule]] | None = None
+        self.__rule_count = -1
+
+    def __reset_derived__(self) -> None:
+        self.__frame_x: float | None = None
+        self.__frame_y: float | None = None
+        self.__leaf_sum_x: float | None = None
+        self.__leaf_y: float | None = None
+
+    def __read__(self, field: str, /) -> None:
+        if self.__reads is not None:
+            self.__reads.add(field)
+
+    def __write__(self, field: str, /) -> None:
+        self.__reset_derived__()
+
+        if self.__dirty is not None:
+            self.__dirty.add(field)
+
     @property
     def type(self) -> DoorType:
+        self.__read__("type")
         return self.__type
 
     @type.setter
     def type(self, value: DoorType):
         self.__type = value
+        self.__write__("type")
         self.reset_leaf_split()
 
     @property
@@ -44,20 +122,24 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
 
     @property
     def so_x(self) -> float:
+        self.__read__("so_x")
         return self.__so_x
 
     @so_x.setter
     def so_x(self, value: float):
         self.__so_x = value
+        self.__write__("so_x")
         self.reset_leaf_split()
 
     @property
     def so_y(self) -> float:
+        self.__read__("so_y")
         return self.__so_y
 
     @so_y.setter
     def so_y(self, value: float):
         self.__so_y = value
+        self.__write__("so_y")
 
     @property
     def so_to_frame_x(self) -> float:
@@ -69,7 +151,10 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
 
     @property
     def frame_x(self) -> float:
-        return self.so_x + self.so_to_frame_x
+        # While a rule is recorded the chain is walked again, so its fields are still seen
+        if self.__frame_x is None or self.__reads is not None:
+            self.__frame_x = self.so_x + self.so_to_frame_x
+        return self.__frame_x
 
     @frame_x.setter
     def frame_x(self, value: float):
@@ -77,7 +162,9 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
 
     @property
     def frame_y(self) -> float:
-        return self.so_y + self.so_to_frame_y
+        if self.__frame_y is None or self.__reads is not None:
+            self.__frame_y = self.so_y + self.so_to_frame_y
+        return self.__frame_y
 
     @frame_y.setter
     def frame_y(self, value: float):
@@ -96,11 +183,14 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
 
     @property
     def leaf_sum_x(self) -> float:
-        return self.frame_x + self.frame_to_leaf_x
+        if self.__leaf_sum_x is None or self.__reads is not None:
+            self.__leaf_sum_x = self.frame_x + self.frame_to_leaf_x
+        return self.__leaf_sum_x
 
     @property
     def active_leaf_x(self) -> float:
         if self.is_double:
+            self.__read__("leaf_split")
             return self.__leaf_split[0]
         else:
             return self.leaf_sum_x
@@ -113,10 +203,12 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
             raise ValueError(f"Active leaf width of {value}mm is out of range.")
         else:
             self.__leaf_split = (value, self.leaf_sum_x - value)
+            self.__write__("leaf_split")
 
     @property
     def passive_leaf_x(self) -> float | None:
         if self.is_double:
+            self.__read__("leaf_split")
             return self.__leaf_split[1]
         else:
             return None
@@ -129,29 +221,121 @@ class Door(ComparesIDFormattedMixin, ComparesIDFormattedABC):
             raise ValueError(f"Passive leaf width of {value}mm is out of range.")
         else:
             self.__leaf_split = (self.leaf_sum_x - value, value)
+            self.__write__("leaf_split")
 
     @property
     def leaf_y(self) -> float:
-        return self.frame_y + self.frame_to_leaf_y
+        if self.__leaf_y is None or self.__reads is not None:
+            self.__leaf_y = self.frame_y + self.frame_to_leaf_y
+        return self.__leaf_y
 
     @leaf_y.setter
     def leaf_y(self, value: float):
         self.frame_y = value - self.frame_to_leaf_y
 
+    @property
+    def config(self) -> dict[str, Any]:
+        self.__read__("leaf_split")
+
+        # Everything that affects generated output, in a JSON-stable form
+        return {
+            "type": self.type.value,
+            "so_x": float(self.so_x),
+            "so_y": float(self.so_y),
+            "leaf_split": list(self.__leaf_split) if self.is_double else None,
+        }
+
+    @property
+    def artifact_key(self) -> str:
+        return artifact_key(self.config)
+
     def reset_leaf_split(self) -> None:
         if self.is_double:
             self.__leaf_split = (self.leaf_sum_x / 2, self.leaf_sum_x / 2)
         else:
             self.__leaf_split = None
 
-    def validate(self) -> None:
-        results = set()
+        self.__write__("leaf_split")
 
-        for rule in door_rules:
+    @staticmethod
+    def fields_for(names: Iterable[str], /) -> frozenset[str]:
+        return _fields_for(frozenset(names))
+
+    def reads(self, attribute: str | Callable[[Door], Any], /) -> frozenset[str]:
+        self.__reads = set()
+
+        try:
+            attribute(self) if callable(attribute) else getattr(self, attribute)
+            return frozenset(self.__reads)
+        finally:
+            self.__reads = None
+
+    def __forget__(self, rule: DoorRule, /) -> None:
+        self.__failures.pop(rule, None)
+        for field in self.__rule_reads.pop(rule, ()):
+            self.__dependents[field].discard(rule)
+
+    def __evaluate__(self, rule: DoorRule, /) -> None:
+        declared = door_rule_reads.get(rule)
+        self.__reads = set() if declared is None else None
+
+        try:
             result = rule(self)
-            results.add(result)
+        except BaseException:
+            # The rule is left unevaluated, so the next validation resynchronises
+            self.__forget__(rule)
+            self.__rule_count = -1
+            raise
+        finally:
+            reads, self.__reads = self.__reads, None
+
+        if result is None:
+            self.__failures.pop(rule, None)
+        else:
+            self.__failures[rule] = result
+
+        reads = _fields_for(declared) if reads is None else reads
+        previous = self.__rule_reads.get(rule, frozenset())
+
+        # Branches rarely change which fields a rule reads, so the index is usually untouched
+        if reads != previous:
+            for field in previous - reads:
+                self.__dependents[field].discard(rule)
+            for field in reads - previous:
+                self.__dependents.setdefault(field, set()).add(rule)
+            self.__rule_reads[rule] = frozenset(reads)
+
+    def __sync_rules__(self) -> None:
+        if self.__rule_reads is None:
+            self.__dirty, self.__failures, self.__rule_reads, self.__dependents = (
+                set(),
+                {},
+                {},
+                {},
+            )
+
+        registered = set(door_rules)
+
+        for rule in self.__rule_reads.keys() - registered:
+            self.__forget__(rule)
+        for rule in door_rules:
+            if rule not in self.__rule_reads:
+                self.__evaluate__(rule)
+
+        self.__rule_count = len(door_rules)
+
+    def validate(self) -> None:
+        if len(door_rules) != self.__rule_count:
+            self.__sync_rules__()
+
+        dirty = self.__dirty
+
+        # Only rules that read a field written since the last validation are run again
+        stale = set().union(*(self.__dependents.get(field, ()) for field in dirty))
+        for rule in stale:
+            self.__evaluate__(rule)
 
-        results.discard(None)
+        dirty.clear()
 
-        if results:
-            raise ValidationError(results)
+        if self.__failures:
+            raise ValidationError(set(self.__failures.values()))
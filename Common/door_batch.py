@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from functools import cache
+from typing import TYPE_CHECKING
+
+from numpy import (
+    asarray,
+    flatnonzero,
+    float64,
+    fromiter,
+    int8,
+    nan,
+    stack,
+    where,
+    zeros,
+)
+
+from .door import Door
+from .enums import DoorType
+from .rules import batch_door_rules, door_rules
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from numpy.typing import ArrayLike, NDArray
+
+    from .rules import DoorRule
+
+__all__ = ("DoorBatch",)
+
+
+@cache
+def _offsets(name: str, /) -> NDArray:
+    # Offsets are read off one door of each type, so Door stays the single source of truth
+    table = zeros(max(t.value for t in DoorType) + 1)
+    for door_type in DoorType:
+        table[door_type.value] = getattr(Door(type=door_type), name)
+    return table
+
+
+class DoorBatch:
+    __slots__ = ("type", "so_x", "so_y", "leaf_split", "__doors")
+
+    def __init__(
+        self,
+        type: ArrayLike,
+        so_x: ArrayLike,
+        so_y: ArrayLike,
+        leaf_split: ArrayLike | None = None,
+        /,
+    ):
+        self.type: NDArray = asarray(type, dtype=int8)
+        self.so_x: NDArray = asarray(so_x, dtype=float64)
+        self.so_y: NDArray = asarray(so_y, dtype=float64)
+
+        if leaf_split is None:
+            half = self.leaf_sum_x / 2
+            leaf_split = where(self.is_double[:, None], stack((half, half), axis=1), nan)
+
+        # Single doors hold NaN in both columns, as they have no split
+        self.leaf_split: NDArray = asarray(leaf_split, dtype=float64).reshape(len(self), 2)
+        self.__doors: tuple[Door, ...] | None = None
+
+    @classmethod
+    def from_doors(cls, doors: Iterable[Door], /) -> DoorBatch:
+        doors = tuple(doors)
+        leaf_split = [
+            (door.active_leaf_x, door.passive_leaf_x) if door.is_double else (nan, nan)
+            for door in doors
+        ]
+
+        batch = cls(
+            [door.type.value for door in doors],
+            [door.so_x for door in doors],
+            [door.so_y for door in doors],
+            leaf_split,
+        )
+        batch.__doors = doors
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.type)
+
+    def door(self, index: int, /) -> Door:
+        if self.__doors is not None:
+            return self.__doors[index]
+
+        door = Door(
+            type=DoorType(int(self.type[index])),
+            so_x=float(self.so_x[index]),
+            so_y=float(self.so_y[index]),
+        )
+        if door.is_double:
+            door.active_leaf_x = float(self.leaf_split[index, 0])
+        return door
+
+    @property
+    def is_double(self) -> NDArray:
+        return self.type == DoorType.Double.value
+
+    @property
+    def frame_x(self) -> NDArray:
+        return self.so_x + _offsets("so_to_frame_x")[self.type]
+
+    @property
+    def frame_y(self) -> NDArray:
+        return self.so_y + _offsets("so_to_frame_y")[self.type]
+
+    @property
+    def leaf_sum_x(self) -> NDArray:
+        return self.frame_x + _offsets("frame_to_leaf_x")[self.type]
+
+    @property
+    def active_leaf_x(self) -> NDArray:
+        return where(self.is_double, self.leaf_split[:, 0], self.leaf_sum_x)
+
+    @property
+    def passive_leaf_x(self) -> NDArray:
+        return self.leaf_split[:, 1]
+
+    @property
+    def leaf_y(self) -> NDArray:
+        return self.frame_y + _offsets("frame_to_leaf_y")[self.type]
+
+    def doors(self) -> tuple[Door, ...]:
+        if self.__doors is None:
+            self.__doors = tuple(map(self.door, range(len(self))))
+        return self.__doors
+
+    def violations(self, rules: Iterable[DoorRule] | None = None, /) -> dict[DoorRule, NDArray]:
+        masks = {}
+
+        for rule in door_rules if rules is None else rules:
+            batch = batch_door_rules.get(rule)
+
+            if batch is not None:
+                masks[rule] = asarray(batch(self), dtype=bool)
+            else:
+                # Rules without a vectorised form still work, one door at a time
+                masks[rule] = fromiter(
+                    (rule(door) is not None for door in self.doors()), bool, len(self)
+                )
+
+        return masks
+
+    def validate(self) -> dict[int, set[str]]:
+        results = {}
+
+        # Only the doors a mask flags go through the scalar rule, to collect its message
+        for rule, mask in self.violations().items():
+            for index in flatnonzero(mask).tolist():
+                result = rule(self.door(index))
+                if result is not None:
+                    results.setdefault(index, set()).add(result)
+
+        return results
@@ -8,6 +8,7 @@ from aiohttp import ClientSession
 
 from .errors import HTTPException
 from .utils import log, to_json
+from .websocket_extensions import CustomClientWSResponse, WSEncoding
 
 if TYPE_CHECKING:
     from collections.abc import Coroutine
@@ -39,7 +40,7 @@ class HTTPClient:
             return None
 
     async def create_connection(self) -> None:
-        self.__session = ClientSession()
+        self.__session = ClientSession(ws_response_class=CustomClientWSResponse)
 
     async def close_connection(self) -> None:
         if self.is_open is True:
@@ -112,6 +113,22 @@ class HTTPClient:
 
                 raise error
 
+    async def ws_connect(
+        self, url: URL, /, *, resume: CustomClientWSResponse | None = None, **kwargs: Any
+    ) -> CustomClientWSResponse:
+        if self.is_open is False:
+            raise RuntimeError("HTTP session is closed.")
+
+        params = dict(kwargs.pop("params", None) or {})
+
+        # Passing back the last acknowledged Event has the server replay only what was missed
+        if resume is not None and resume.last_acked is not None:
+            params["last_event_id"] = resume.last_acked
+
+        return await self.__session.ws_connect(
+            str(url), protocols=WSEncoding.protocols(), params=params, **kwargs
+        )
+
     def get(self, url: URL, /, **kwargs: Any) -> JsonCoro:
         return self.request("get", url, **kwargs)
 
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from numpy import (
+    arange,
+    asarray,
+    flatnonzero,
+    ix_,
+    meshgrid,
+    nan,
+    ones,
+    stack,
+    where,
+    zeros,
+)
+
+from .door import DOOR_FIELDS, Door
+from .door_batch import DoorBatch
+from .enums import DoorType
+from .rules import door_rule_reads, door_rules
+from .utils import log
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from typing import Any
+
+    from numpy.typing import NDArray
+
+    from .config import ConfiguratorConfig
+    from .rules import DoorRule
+
+__all__ = ("DOOR_OPTIONS", "OptionEngine")
+
+
+DOOR_OPTIONS = ("type", "so_x", "so_y", "active_leaf_x")
+
+# The options each stored field is configured through; a split only makes sense against a width
+FIELD_OPTIONS = {
+    "type": ("type",),
+    "so_x": ("so_x",),
+    "so_y": ("so_y",),
+    "leaf_split": ("so_x", "active_leaf_x"),
+}
+
+
+class _Table:
+    __slots__ = ("options", "valid")
+
+    def __init__(self, options: tuple[str, ...], valid: NDArray, /):
+        self.options = options
+        self.valid = valid
+
+
+class OptionEngine:
+    __slots__ = ("config", "values", "__tables", "__rule_count", "__lock")
+
+    def __init__(self, *, config: ConfiguratorConfig):
+        self.config = config
+
+        step = config.step
+        self.values: dict[str, NDArray] = {
+            "type": asarray([door_type.value for door_type in DoorType]),
+            "so_x": arange(config.so_x_min, config.so_x_max + step / 2, step),
+            "so_y": arange(config.so_y_min, config.so_y_max + step / 2, step),
+            "active_leaf_x": arange(step, config.so_x_max + step / 2, step),
+        }
+
+        self.__tables: list[_Table] = []
+        self.__rule_count = -1
+        # Queries run in worker threads, so only one of them may rebuild the tables
+        self.__lock = Lock()
+
+    @property
+    def tables(self) -> list[_Table]:
+        # Rules register on import, so the tables follow the registry rather than a snapshot
+        if self.__rule_count != len(door_rules):
+            with self.__lock:
+                # Another thread may have rebuilt them while this one waited
+                if self.__rule_count != len(door_rules):
+                    self.build()
+        return self.__tables
+
+    def options_for(self, rule: DoorRule, /) -> tuple[str, ...]:
+        declared = door_rule_reads.get(rule)
+
+        if declared is not None:
+            fields = Door.fields_for(declared)
+        else:
+            fields, config = set(), self.config
+
+            # Corners of the grid stand in for the branches a rule may take
+            for door_type in DoorType:
+                for so_x in (config.so_x_min, config.so_x_max):
+                    for so_y in (config.so_y_min, config.so_y_max):
+                        door = Door(type=door_type, so_x=so_x, so_y=so_y)
+                        try:
+                            fields |= door.reads(rule)
+                        except Exception:
+                            fields = DOOR_FIELDS
+                            break
+
+        options = {"type"}.union(*(FIELD_OPTIONS[field] for field in fields))
+        return tuple(option for option in DOOR_OPTIONS if option in options)
+
+    def build(self) -> None:
+        groups: dict[tuple[str, ...], list[DoorRule]] = {}
+
+        for rule in door_rules:
+            groups.setdefault(self.options_for(rule), []).append(rule)
+
+        # Leaves must fit within their frame, whatever the rules say
+        groups.setdefault(("type", "so_x", "active_leaf_x"), [])
+
+        self.__tables = [self.__tabulate__(options, rules) for options, rules in groups.items()]
+        self.__rule_count = len(door_rules)
+
+        cells = sum(table.valid.size for table in self.__tables)
+        log(f"Built {len(self.__tables)} option table(s) with {cells} cell(s).")
+
+    def __tabulate__(self, options: tuple[str, ...], rules: Iterable[DoorRule], /) -> _Table:
+        grids = meshgrid(*(self.values[option] for option in options), indexing="ij")
+        shape = grids[0].shape
+        cells = dict(zip(options, (grid.ravel() for grid in grids)))
+
+        # Options a table does not cover are left at a default door's values
+        default = Door()
+        size = grids[0].size
+        door_type = cells["type"]
+        so_x = cells.get("so_x", ones(size) * default.so_x)
+        so_y = cells.get("so_y", ones(size) * default.so_y)
+
+        batch = DoorBatch(door_type, so_x, so_y)
+        valid = ones(size, dtype=bool)
+        leaf_split = None
+
+        if "active_leaf_x" in cells:
+            active, leaf_sum_x = cells["active_leaf_x"], batch.leaf_sum_x
+            valid = ~batch.is_double | ((active > 0) & (active < leaf_sum_x))
+            leaf_split = where(
+                batch.is_double[:, None], stack((active, leaf_sum_x - active), axis=1), nan
+            )
+
+        indices = flatnonzero(valid)
+        batch = DoorBatch(
+            door_type[indices],
+            so_x[indices],
+            so_y[indices],
+            None if leaf_split is None else leaf_split[indices],
+        )
+
+        violated = zeros(len(indices), dtype=bool)
+        for mask in batch.violations(rules).values():
+            violated |= mask
+
+        valid[indices[violated]] = False
+        return _Table(options, valid.reshape(shape))
+
+    def domain_for(self, option: str, value: Any, /) -> NDArray:
+        values = self.values[option]
+
+        if option == "type":
+            domain = values == value
+            if not domain.any():
+                raise ValueError(f"{value!r} is not a door type.")
+            return domain
+
+        domain = zeros(len(values), dtype=bool)
+        index = round((float(value) - values[0]) / self.config.step)
+
+        # A value off the grid has no supported configuration at all
+        if 0 <= index < len(values):
+            domain[index] = True
+        return domain
+
+    def intervals(self, option: str, domain: NDArray, /) -> list[list[float]]:
+        indices = flatnonzero(domain)
+        if not len(indices):
+            return []
+
+        breaks = flatnonzero(indices[1:] - indices[:-1] > 1)
+        starts = [indices[0], *indices[breaks + 1]]
+        ends = [*indices[breaks], indices[-1]]
+
+        values = self.values[option]
+        return [[float(values[start]), float(values[end])] for start, end in zip(starts, ends)]
+
+    def __propagate__(self, domains: dict[str, NDArray], /) -> None:
+        tables = self.tables
+        versions = dict.fromkeys(domains, 0)
+        seen: list[tuple[int, ...] | None] = [None] * len(tables)
+        changed = True
+
+        # Each table narrows its options to values it still supports, until nothing changes
+        while changed:
+            changed = False
+
+            for i, table in enumerate(tables):
+                current = tuple(versions[option] for option in table.options)
+                if seen[i] == current:
+                    continue
+
+                # Slicing out the values still in play keeps fixed options from costing anything
+                indices = [flatnonzero(domains[option]) for option in table.options]
+                valid = table.valid[ix_(*indices)]
+                axes = range(valid.ndim)
+
+                for axis, option in enumerate(table.options):
+                    support = valid.any(axis=tuple(j for j in axes if j != axis))
+
+                    if not support.all():
+                        domains[option] = domains[option].copy()
+                        domains[option][indices[axis][~support]] = False
+                        versions[option] += 1
+                        changed = True
+
+                seen[i] = tuple(versions[option] for option in table.options)
+
+    def query(self, partial: Mapping[str, Any], /) -> dict[str, Any]:
+        domains = {
+            option: ones(len(self.values[option]), dtype=bool) for option in DOOR_OPTIONS
+        }
+
+        for option, value in partial.items():
+            if option not in domains:
+                raise ValueError(f"{option!r} is not a door option.")
+            domains[option] = self.domain_for(option, value)
+
+        self.__propagate__(domains)
+
+        # Single doors have no split, so the leaf options come from double doors alone
+        double = self.domain_for("type", DoorType.Double.value)
+        if not (domains["type"] & double).any():
+            active = None
+        elif (domains["type"] & ~double).any():
+            doubles = {**domains, "type": domains["type"] & double}
+            self.__propagate__(doubles)
+            active = self.intervals("active_leaf_x", doubles["active_leaf_x"])
+        else:
+            active = self.intervals("active_leaf_x", domains["active_leaf_x"])
+
+        return {
+            "type": self.values["type"][domains["type"]].tolist(),
+            "so_x": self.intervals("so_x", domains["so_x"]),
+            "so_y": self.intervals("so_y", domains["so_y"]),
+            "active_leaf_x": active,
+        }
@@ -19,6 +19,7 @@ if TYPE_CHECKING:
 
     from asyncpg import Connection, Pool, Record
 
+    from .catalog import CatalogRow
     from .config import PostgresConfig
 
     T = TypeVar("T")
@@ -230,3 +231,10 @@ class PostgreSQLClient:
         owner = await self.get_user(user_id=owner_id, with_password=False)
 
         return cls(quote_record, owner)
+
+    async def get_catalog_rows(self) -> list[CatalogRow]:
+        item_records = await self.fetch_all(
+            "SELECT item_code, description, unit_cost, weight FROM items ORDER BY item_code"
+        )
+
+        return [tuple(record) for record in item_records]
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from numpy import (
+    argsort,
+    asarray,
+    bincount,
+    concatenate,
+    flatnonzero,
+    float64,
+    full,
+    inf,
+    int64,
+    split,
+    take_along_axis,
+    unique,
+    zeros,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Mapping, Sequence
+    from typing import Any
+
+    from numpy.typing import ArrayLike, NDArray
+
+    from .catalog import ItemCatalog
+    from .company import Company
+
+__all__ = ("Surcharge", "PriceList", "QuotePricer")
+
+
+class Surcharge:
+    __slots__ = ("name", "rate", "amount", "items")
+
+    def __init__(
+        self,
+        name: str,
+        /,
+        *,
+        rate: float = 0.0,
+        amount: float = 0.0,
+        items: Iterable[str] | None = None,
+    ):
+        self.name = name
+        self.rate = rate
+        self.amount = amount
+        # None applies the rate to every line
+        self.items = None if items is None else frozenset(items)
+
+
+class PriceList:
+    __slots__ = (
+        "codes",
+        "surcharges",
+        "__ids",
+        "__prices",
+        "__break_mins",
+        "__break_prices",
+        "__members",
+        "__discounts",
+    )
+
+    def __init__(
+        self,
+        prices: Mapping[str, float],
+        /,
+        *,
+        breaks: Mapping[str, Iterable[tuple[float, float]]] | None = None,
+        discounts: Mapping[int, float] | None = None,
+        surcharges: Iterable[Surcharge] = (),
+    ):
+        self.codes = tuple(prices)
+        self.surcharges = tuple(surcharges)
+        self.__ids = {code: i for i, code in enumerate(self.codes)}
+        self.__prices = asarray(tuple(prices.values()), dtype=float64)
+        self.__discounts = dict(discounts or {})
+
+        # Breaks are padded into a dense (item, tier) table, so a tier lookup is one comparison
+        tiers = {code: sorted(tiers) for code, tiers in (breaks or {}).items()}
+        width = max(map(len, tiers.values()), default=0)
+
+        self.__break_mins = full((len(self.codes), width), inf)
+        self.__break_prices = zeros((len(self.codes), width))
+
+        for code, code_tiers in tiers.items():
+            item_id = self.__ids[code]
+            for tier, (minimum, price) in enumerate(code_tiers):
+                self.__break_mins[item_id, tier] = minimum
+                self.__break_prices[item_id, tier] = price
+
+        self.__members = full((len(self.codes), len(self.surcharges)), True)
+        for column, surcharge in enumerate(self.surcharges):
+            if surcharge.items is not None:
+                self.__members[:, column] = False
+                self.__members[self.ids_for(surcharge.items & self.__ids.keys()), column] = True
+
+    @classmethod
+    def from_catalog(
+        cls, catalog: ItemCatalog, /, *, markup: float = 0.0, **kwargs: Any
+    ) -> PriceList:
+        prices = {item.item_code: item.unit_cost * (1.0 + markup) for item in catalog}
+        return cls(prices, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, item_code: str) -> bool:
+        return item_code in self.__ids
+
+    def discount_for(self, company: Company | None, /) -> float:
+        return 0.0 if company is None else self.__discounts.get(company.id, 0.0)
+
+    def ids_for(self, codes: Collection[str], /) -> NDArray:
+        ids = [self.__ids.get(code) for code in codes]
+
+        if None in ids:
+            missing = sorted({code for code, item_id in zip(codes, ids) if item_id is None})
+            raise ValueError(f"No price for item codes: {', '.join(missing)}")
+
+        return asarray(ids, dtype=int64)
+
+    def surcharge_members(self, ids: NDArray, /) -> NDArray:
+        return self.__members[ids]
+
+    def unit_prices(self, ids: NDArray, quantities: NDArray, /) -> NDArray:
+        prices = self.__prices[ids]
+        if not self.__break_mins.shape[1]:
+            return prices
+
+        # The highest tier whose minimum the quantity reaches, or -1 for the base price
+        tier = (self.__break_mins[ids] <= quantities[:, None]).sum(axis=1) - 1
+        reached = tier >= 0
+
+        tiered = take_along_axis(self.__break_prices[ids], tier.clip(0)[:, None], axis=1)[:, 0]
+        prices[reached] = tiered[reached]
+        return prices
+
+
+class QuotePricer:
+    __slots__ = (
+        "price_list",
+        "company",
+        "__ids",
+        "__codes",
+        "__global",
+        "__members",
+        "__quantities",
+        "__unit_prices",
+        "__nets",
+        "__doors",
+    )
+
+    def __init__(self, price_list: PriceList, /, *, company: Company | None = None):
+        self.price_list = price_list
+        self.company = company
+
+        # Items are interned per quote so that state scales with the quote, not the price list
+        self.__ids: dict[str, int] = {}
+        self.__codes: list[str] = []
+        self.__global = zeros(0, dtype=int64)
+        self.__members = zeros((0, len(price_list.surcharges)), dtype=bool)
+        self.__quantities = zeros(0)
+        self.__unit_prices = zeros(0)
+        self.__nets = zeros(0)
+        self.__doors: dict[int, tuple[NDArray, NDArray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__codes)
+
+    def __intern__(self, codes: Sequence[str], /) -> NDArray:
+        new = [code for code in dict.fromkeys(codes) if code not in self.__ids]
+
+        if new:
+            global_ids = self.price_list.ids_for(new)
+
+            self.__ids.update(zip(new, range(len(self.__codes), len(self.__codes) + len(new))))
+            self.__codes += new
+
+            self.__global = concatenate((self.__global, global_ids))
+            self.__members = concatenate(
+                (self.__members, self.price_list.surcharge_members(global_ids))
+            )
+            self.__quantities = concatenate((self.__quantities, zeros(len(new))))
+            self.__unit_prices = concatenate((self.__unit_prices, zeros(len(new))))
+            self.__nets = concatenate((self.__nets, zeros(len(new))))
+
+        ids = self.__ids
+        return asarray([ids[code] for code in codes], dtype=int64)
+
+    def __reprice__(self, ids: NDArray, /) -> None:
+        quantities = self.__quantities[ids]
+        prices = self.price_list.unit_prices(self.__global[ids], quantities)
+
+        self.__unit_prices[ids] = prices
+        self.__nets[ids] = prices * quantities
+
+    def load(
+        self, codes: Sequence[str], items: NDArray, quantities: NDArray, doors: NDArray, /
+    ) -> None:
+        self.__doors.clear()
+        self.__quantities[:] = 0.0
+        self.__nets[:] = 0.0
+
+        ids = self.__intern__(codes)[items]
+        quantities = asarray(quantities, dtype=float64)
+        doors = asarray(doors)
+
+        order = argsort(doors, kind="stable")
+        door_ids, starts = unique(doors[order], return_index=True)
+        for door, door_items, door_quantities in zip(
+            door_ids.tolist(),
+            split(ids[order], starts[1:]),
+            split(quantities[order], starts[1:]),
+        ):
+            self.__doors[door] = (door_items, door_quantities)
+
+        self.__quantities += bincount(ids, weights=quantities, minlength=len(self))
+        self.__reprice__(flatnonzero(self.__quantities))
+
+    def set_door(self, door: int, codes: Sequence[str], quantities: ArrayLike, /) -> None:
+        ids = self.__intern__(codes)
+        quantities = asarray(quantities, dtype=float64)
+
+        old_ids, old_quantities = self.__doors.pop(door, (ids[:0], quantities[:0]))
+        self.__doors[door] = (ids, quantities)
+
+        # Only items this door touches can change price, even when a quantity break is crossed
+        self.__quantities -= bincount(old_ids, weights=old_quantities, minlength=len(self))
+        self.__quantities += bincount(ids, weights=quantities, minlength=len(self))
+        self.__reprice__(unique(concatenate((old_ids, ids))))
+
+    def remove_door(self, door: int, /) -> None:
+        self.set_door(door, (), ())
+        del self.__doors[door]
+
+    @property
+    def subtotal(self) -> float:
+        return float(self.__nets.sum())
+
+    @property
+    def discount_rate(self) -> float:
+        return self.price_list.discount_for(self.company)
+
+    def surcharges(self) -> dict[str, float]:
+        discounted = 1.0 - self.discount_rate
+        bases = self.__nets @ self.__members
+
+        has_lines = bool(self.__quantities.any())
+        surcharges = {}
+
+        for surcharge, base in zip(self.price_list.surcharges, bases):
+            # A flat amount is only charged when the quote has lines for it to apply to
+            applies = has_lines if surcharge.items is None else bool(base)
+            amount = surcharge.amount if applies else 0.0
+            surcharges[surcharge.name] = surcharge.rate * float(base) * discounted + amount
+
+        return surcharges
+
+    def totals(self) -> dict[str, Any]:
+        subtotal = self.subtotal
+        discount = subtotal * self.discount_rate
+        surcharges = self.surcharges()
+
+        return {
+            "subtotal": subtotal,
+            "discount": discount,
+            "surcharges": surcharges,
+            "total": subtotal - discount + sum(surcharges.values()),
+        }
+
+    def lines(self) -> list[dict[str, Any]]:
+        present = flatnonzero(self.__quantities)
+        codes = self.__codes
+
+        return [
+            {"item_code": codes[i], "quantity": quantity, "unit_price": price, "net": net}
+            for i, quantity, price, net in zip(
+                present.tolist(),
+                self.__quantities[present].tolist(),
+                self.__unit_prices[present].tolist(),
+                self.__nets[present].tolist(),
+            )
+        ]
@@ -45,6 +45,11 @@ class ResourceABC(ComparesIDFormattedABC, ABC):
     def to_json(self, *, version: ResourceJSONVersion) -> Json:
         pass
 
+    @property
+    def artifact_keys(self) -> frozenset[str]:
+        # Resources that hold doors return their doors' keys; only these can be downloaded
+        return frozenset()
+
 
 class ResourceMixin(ComparesIDFormattedMixin):
     __slots__ = ()
@@ -126,3 +131,5 @@ class Resource(Protocol):
     ) -> None: ...
     def ensure_acquired(self, session: Session, /) -> None: ...
     def to_json(self, *, version: ResourceJSONVersion) -> Json: ...
+    @property
+    def artifact_keys(self) -> frozenset[str]: ...
@@ -3,19 +3,42 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable
+
+    from numpy.typing import NDArray
 
     from .door import Door
+    from .door_batch import DoorBatch
 
     MaybeStr = str | None
     DoorRule = Callable[[Door], MaybeStr]
+    BatchDoorRule = Callable[[DoorBatch], NDArray]
 
-__all__ = ("door_rules", "door_rule")
+__all__ = ("door_rules", "batch_door_rules", "door_rule_reads", "door_rule")
 
 
 door_rules: list[DoorRule] = []
 
-
-def door_rule(func: DoorRule, /) -> DoorRule:
-    door_rules.append(func)
-    return func
+# Vectorised forms keyed by their scalar rule, returning a mask of the doors that break it
+batch_door_rules: dict[DoorRule, BatchDoorRule] = {}
+
+# Door attributes a rule declares it reads; rules left out have their reads recorded instead
+door_rule_reads: dict[DoorRule, frozenset[str]] = {}
+
+
+def door_rule(
+    func: DoorRule | None = None,
+    /,
+    *,
+    batch: BatchDoorRule | None = None,
+    reads: Iterable[str] | None = None,
+) -> DoorRule | Callable[[DoorRule], DoorRule]:
+    def decorator(rule: DoorRule, /) -> DoorRule:
+        door_rules.append(rule)
+        if batch is not None:
+            batch_door_rules[rule] = batch
+        if reads is not None:
+            door_rule_reads[rule] = frozenset(reads)
+        return rule
+
+    return decorator if func is None else decorator(func)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import deque
 from typing import TYPE_CHECKING
 
 from .bases import ComparesIDABC, ComparesIDMixin
@@ -17,11 +18,13 @@ if TYPE_CHECKING:
     from .token import Token
     from .user import User
 
+    Json = dict[str, Any]
+
 __all__ = ("Session",)
 
 
 class Session(ComparesIDMixin, ComparesIDABC):
-    __slots__ = ("_id", "_user", "_state", "_resource", "_connections")
+    __slots__ = ("_id", "_user", "_state", "_resource", "_connections", "_replay")
 
     def __init__(
         self,
@@ -30,12 +33,14 @@ class Session(ComparesIDMixin, ComparesIDABC):
         /,
         *,
         state: State | None = None,
+        replay_size: int = 256,
     ):
         self._id = _id
         self._user = user
         self._state = state if state is not None else State()
         self._resource = None
         self._connections = {}
+        self._replay: deque[Json] = deque(maxlen=replay_size)
 
     @property
     def id(self) -> str:
@@ -65,6 +70,21 @@ class Session(ComparesIDMixin, ComparesIDABC):
     def connected(self) -> bool:
         return bool(self._connections)
 
+    def record_event(self, event: Json, /) -> None:
+        self._replay.append(event)
+
+    def events_since(self, event_id: str, /) -> list[Json] | None:
+        events = []
+
+        for event in reversed(self._replay):
+            if event["id"] == event_id:
+                events.reverse()
+                return events
+            events.append(event)
+
+        # The event is unknown or has already been evicted, so the tail can't be rebuilt
+        return None
+
     def acquire_resource(self, resource: Resource, /) -> None:
         if not self.bound:
             resource.acquire(self)
@@ -5,7 +5,7 @@ from logging import DEBUG, ERROR, INFO, WARNING, basicConfig, getLogger
 from os import makedirs
 from pathlib import Path
 from sys import exc_info
-from time import time
+from time import monotonic, time
 from typing import TYPE_CHECKING
 
 from bcrypt import checkpw, gensalt, hashpw
@@ -26,6 +26,8 @@ __all__ = (
     "encrypt_password",
     "setup_logging",
     "check_ratelimit",
+    "ratelimit_delay",
+    "TokenBucket",
     "log",
     "to_json",
 )
@@ -86,6 +88,56 @@ def check_ratelimit(hits: list[float], /, *, limit: int, interval: float) -> lis
     return recent_hits
 
 
+def ratelimit_delay(hits: list[float], /, *, limit: int, interval: float) -> float:
+    current_time = time()
+
+    recent_hits = [hit for hit in hits if hit + interval > current_time]
+
+    if len(recent_hits) < limit:
+        return 0.0
+
+    # Hits are appended in order, so a slot frees up when the oldest recent one expires
+    return recent_hits[-limit] + interval - current_time
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "_tokens", "_updated")
+
+    def __init__(self, *, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        current_time = monotonic()
+        elapsed = current_time - self._updated
+        self._updated = current_time
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def delay(self, amount: float, /) -> float:
+        self._refill()
+
+        # Anything larger than the burst size is let through once the bucket is full
+        deficit = min(amount, self.capacity) - self._tokens
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount: float, /) -> float:
+        self._refill()
+        self._tokens -= amount
+
+        # The bucket may go into debt; the caller should wait until it is repaid
+        if self._tokens >= 0:
+            return 0.0
+        else:
+            return -self._tokens / self.rate
+
+
 def log(message: str, level: int = INFO, /) -> None:
     with_traceback = exc_info()[0] is not None and level >= ERROR
     _logger.log(level, message, exc_info=with_traceback)
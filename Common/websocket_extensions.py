@@ -1,25 +1,45 @@
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from enum import IntEnum, StrEnum
-from json import JSONDecodeError
+from json import dumps, loads
+from time import monotonic
 from typing import TYPE_CHECKING
+from uuid import uuid4
 
 from aiohttp import ClientWebSocketResponse, WSCloseCode, WSMsgType
 from aiohttp.web import WebSocketResponse
+from msgpack import packb, unpackb
 
 from .bases import ComparesIDABC, ComparesIDMixin
-from .utils import check_ratelimit, decode_datetime
+from .utils import (
+    TokenBucket,
+    check_ratelimit,
+    decode_datetime,
+    encode_datetime,
+    now,
+    ratelimit_delay,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from datetime import datetime
     from typing import Any
 
+    from aiohttp import WSMessage
+    from aiohttp.abc import AbstractStreamWriter
+    from aiohttp.web import BaseRequest
+
     Json = dict[str, Any]
 
 __all__ = (
     "custom_ws_message_factory",
+    "build_ws_event",
+    "build_ws_ack",
     "CustomWSMessageType",
     "WSEventStatus",
+    "WSEncoding",
     "CustomWSCloseCode",
     "CustomWSMessage",
     "WSEvent",
@@ -56,9 +76,67 @@ class CustomWSCloseCode(IntEnum):
     MissingField       = 4003
     InvalidType        = 4004
     InvalidValue       = 4005
+    SlowConsumer       = 4006
 # fmt: on
 
 
+class WSEncoding(StrEnum):
+    JSON = "pdb.json"
+    MessagePack = "pdb.msgpack"
+
+    @classmethod
+    def from_protocol(cls, protocol: str | None, /) -> WSEncoding:
+        try:
+            return cls(protocol)
+        except ValueError:
+            return cls.JSON
+
+    @classmethod
+    def protocols(cls) -> tuple[str, ...]:
+        return tuple(encoding.value for encoding in cls)
+
+    @property
+    def frame_type(self) -> WSMsgType:
+        return WSMsgType.TEXT if self == WSEncoding.JSON else WSMsgType.BINARY
+
+    def dumps(self, json: Json, /) -> str | bytes:
+        if self == WSEncoding.JSON:
+            return dumps(json, separators=(",", ":"))
+        else:
+            return packb(json)
+
+    def loads(self, data: str | bytes, /) -> Any:
+        if self == WSEncoding.JSON:
+            return loads(data)
+        else:
+            return unpackb(data)
+
+
+def build_ws_event(
+    payload: Json,
+    /,
+    *,
+    status: WSEventStatus = WSEventStatus.Ok,
+    reason: str | None = None,
+) -> Json:
+    return {
+        "type": CustomWSMessageType.Event.value,
+        "id": str(uuid4()),
+        "sent_at": encode_datetime(now()),
+        "status": status.value,
+        "reason": reason,
+        "payload": payload,
+    }
+
+
+def build_ws_ack(event_id: str, /) -> Json:
+    return {
+        "type": CustomWSMessageType.Ack.value,
+        "id": event_id,
+        "sent_at": encode_datetime(now()),
+    }
+
+
 class CustomWSMessage(ComparesIDMixin, ComparesIDABC):
     def __init__(self, json: Json, /):
         self._id = json["id"]
@@ -73,23 +151,48 @@ class CustomWSMessage(ComparesIDMixin, ComparesIDABC):
         return self._sent_at
 
 
-class WSEvent(CustomWSMessage): ...
+class WSEvent(CustomWSMessage):
+    def __init__(self, json: Json, /):
+        super().__init__(json)
+        self._status = WSEventStatus(json["status"])
+        self._reason = json.get("reason")
+        self._payload = json["payload"]
+
+        if self._reason is not None and not isinstance(self._reason, str):
+            raise TypeError("Reason must be a string.")
+        elif not isinstance(self._payload, dict):
+            raise TypeError("Payload must be an object.")
+
+    @property
+    def status(self) -> WSEventStatus:
+        return self._status
+
+    @property
+    def reason(self) -> str | None:
+        return self._reason
+
+    @property
+    def payload(self) -> Json:
+        return self._payload
 
 
 class WSAck(CustomWSMessage):
     pass
 
 
-class WSResponseMixin:
+class WSResponseMixin(ABC):
     def __init__(
         self,
-        *,
+        *args: Any,
         ratelimited: bool = False,
         limit: int | None = None,
         interval: float | None = None,
+        byte_limits: dict[type[CustomWSMessage], tuple[float, float]] | None = None,
+        compress_threshold: int = 0,
+        compress_takeover: bool = True,
         **kwargs: Any,
     ):
-        super().__init__(**kwargs)
+        super().__init__(*args, **kwargs)
 
         if ratelimited and (limit is None or interval is None):
             raise TypeError("Limit and interval must both be specified.")
@@ -99,44 +202,235 @@ class WSResponseMixin:
         self.__interval = interval
         self.__hits = []
 
+        # The outstanding rate limit warning, if any, and whether the peer has acknowledged it
+        self.__warning: str | None = None
+        self.__warning_seen = False
+        self.__warned_until = 0.0
+
+        # Maps a message type to a bucket of (bytes per second, burst size in bytes)
+        self.__buckets = {
+            cls: TokenBucket(rate=rate, capacity=capacity)
+            for cls, (rate, capacity) in (byte_limits or {}).items()
+        }
+
+        self.__compress = 0
+        self.__compress_threshold = compress_threshold
+        self.__compress_takeover = compress_takeover
+        self.__configure_writer__()
+
+        self.__last_seen = monotonic()
+        self.__last_acked: str | None = None
+        self.__stalls = 0
+        self.__stalled_since = 0.0
+
+    @property
+    def last_seen(self) -> float:
+        return self.__last_seen
+
+    @property
+    def stalled(self) -> bool:
+        return self.__stalls > 0
+
+    @contextmanager
+    def stall(self) -> Iterator[None]:
+        # Marks a deliberate pause in reading, during which the peer's frames go unread
+        if not self.__stalls:
+            self.__stalled_since = monotonic()
+
+        self.__stalls += 1
+
+        try:
+            yield
+        finally:
+            self.__stalls -= 1
+
+            # Time spent stalled does not count as silence, as if the clock had been paused
+            if not self.__stalls:
+                current_time = monotonic()
+                self.__last_seen = min(
+                    current_time, self.__last_seen + current_time - self.__stalled_since
+                )
+
+    @property
+    def last_acked(self) -> str | None:
+        # Supplied as "last_event_id" when reconnecting to resume the same Session
+        return self.__last_acked
+
+    async def receive(self, timeout: float | None = None) -> WSMessage:
+        while True:
+            message = await super().receive(timeout)  # noqa
+            self.__last_seen = monotonic()
+
+            # Only reached with autoping disabled, i.e. when liveness is managed externally
+            if message.type == WSMsgType.PING:
+                await self.pong(message.data)  # noqa
+            elif message.type != WSMsgType.PONG:
+                return message
+
     async def __anext__(self) -> CustomWSMessage:
-        message = await super().__anext__()  # noqa
+        while True:
+            message = await super().__anext__()  # noqa
+            encoding = self.encoding
+
+            if message.type != encoding.frame_type:
+                await self.__close_and_break__(code=CustomWSCloseCode.InvalidFrameType)
 
-        if self.__ratelimited:
             try:
-                self.__hits = check_ratelimit(
-                    self.__hits, limit=self.__limit, interval=self.__interval
-                )
-            except RuntimeError:
-                await self.__close_and_break__(code=WSCloseCode.POLICY_VIOLATION)
+                json = encoding.loads(message.data)
+            except ValueError:
+                await self.__close_and_break__(code=CustomWSCloseCode.InvalidJSON)
+
+            try:
+                custom_message = custom_ws_message_factory(json)  # noqa
+            except KeyError:
+                await self.__close_and_break__(code=CustomWSCloseCode.MissingField)
+            except TypeError:
+                await self.__close_and_break__(code=CustomWSCloseCode.InvalidType)
+            except ValueError:
+                await self.__close_and_break__(code=CustomWSCloseCode.InvalidValue)
 
-        if message.type != WSMsgType.TEXT:
-            await self.__close_and_break__(code=CustomWSCloseCode.InvalidFrameType)
+            # Budgets are in bytes, so text frames are measured in their encoded form
+            data = message.data
+            size = len(data.encode() if isinstance(data, str) else data)
 
-        try:
-            json = message.json()
-        except JSONDecodeError:
-            await self.__close_and_break__(code=CustomWSCloseCode.InvalidJSON)
+            if await self.__admit__(custom_message, size):  # noqa
+                return custom_message  # noqa
 
-        try:
-            custom_message = custom_ws_message_factory(json)  # noqa
-        except KeyError:
-            await self.__close_and_break__(code=CustomWSCloseCode.MissingField)
-        except TypeError:
-            await self.__close_and_break__(code=CustomWSCloseCode.InvalidType)
-        except ValueError:
-            await self.__close_and_break__(code=CustomWSCloseCode.InvalidValue)
+    def __retry_after__(self, message: CustomWSMessage, size: int, /) -> float:
+        retry_after = 0.0
+
+        if self.__ratelimited:
+            retry_after = ratelimit_delay(
+                self.__hits, limit=self.__limit, interval=self.__interval
+            )
+
+        bucket = self.__buckets.get(type(message))
+        if bucket is not None:
+            retry_after = max(retry_after, bucket.delay(size))
+
+        return retry_after
+
+    def __consume__(self, message: CustomWSMessage, size: int, /) -> None:
+        if self.__ratelimited:
+            self.__hits = check_ratelimit(
+                self.__hits, limit=self.__limit, interval=self.__interval
+            )
+
+        bucket = self.__buckets.get(type(message))
+        if bucket is not None:
+            bucket.consume(size)
+
+    async def __admit__(self, message: CustomWSMessage, size: int, /) -> bool:
+        warning = self.__warning
+
+        if warning is not None and isinstance(message, WSAck) and message.id == warning:
+            # Anything read after this Ack was sent by a peer that had seen the warning
+            self.__warning_seen = True
+            return True
+
+        retry_after = self.__retry_after__(message, size)
+
+        if warning is not None:
+            waiting = monotonic() < self.__warned_until
+
+            if self.__warning_seen or not waiting:
+                # Acks are still allowed while waiting, as they gate the server's own progress
+                early = waiting and not isinstance(message, WSAck)
+
+                # Peers get one warning, and are closed if they ignore it
+                if early or retry_after > 0:
+                    await self.__close_and_break__(code=WSCloseCode.POLICY_VIOLATION)
+
+                if not waiting:
+                    self.__warning = None
+
+            elif retry_after > 0:
+                # Sent before the warning arrived, so it is dropped but not held against it
+                return False
+
+        if retry_after > 0:
+            await self.__warn__(retry_after)
+            return False
 
-        return custom_message  # noqa
+        self.__consume__(message, size)
+        return True
+
+    async def __warn__(self, retry_after: float, /) -> None:
+        event = build_ws_event(
+            {"retry_after": retry_after},
+            status=WSEventStatus.Error,
+            reason="Rate limit exceeded",
+        )
+
+        self.__warning = event["id"]
+        self.__warning_seen = False
+        self.__warned_until = monotonic() + retry_after
+
+        await self.send_message(event)
 
     async def __close_and_break__(self, **kwargs: Any) -> None:
         await self.close(**kwargs)  # noqa
         raise StopAsyncIteration
 
+    @abstractmethod
+    def __protocol__(self) -> str | None:
+        pass
+
+    def __configure_writer__(self) -> None:
+        writer = self._writer  # noqa
+        if writer is None:
+            return
+
+        # Negotiated window bits, restored after sending a frame below the threshold
+        self.__compress = writer.compress
+
+        if not self.__compress_takeover:
+            writer.notakeover = True
+
+    @property
+    def encoding(self) -> WSEncoding:
+        return WSEncoding.from_protocol(self.__protocol__())
+
+    async def send_encoded(self, data: str | bytes, /) -> None:
+        writer = self._writer  # noqa
+        skip_compression = (
+            writer is not None and self.__compress and len(data) < self.__compress_threshold
+        )
+
+        if skip_compression:
+            writer.compress = 0
+
+        try:
+            if isinstance(data, str):
+                await self.send_str(data)  # noqa
+            else:
+                await self.send_bytes(data)  # noqa
+        finally:
+            if skip_compression:
+                writer.compress = self.__compress
+
+    async def send_message(self, json: Json, /) -> None:
+        await self.send_encoded(self.encoding.dumps(json))
+
+    async def send_ack(self, event: WSEvent, /) -> None:
+        await self.send_message(build_ws_ack(event.id))
+        self.__last_acked = event.id
+
 
 class CustomWSResponse(WSResponseMixin, WebSocketResponse):
-    pass
+    async def prepare(self, request: BaseRequest) -> AbstractStreamWriter:
+        writer = await super().prepare(request)
+        self.__configure_writer__()
+        return writer
+
+    def abort(self) -> None:
+        # As aiohttp does for a missed heartbeat; a Close frame would only wait on a dead peer
+        self._handle_ping_pong_exception(TimeoutError("Peer stopped responding."))  # noqa
+
+    def __protocol__(self) -> str | None:
+        return self.ws_protocol
 
 
 class CustomClientWSResponse(WSResponseMixin, ClientWebSocketResponse):
-    pass
+    def __protocol__(self) -> str | None:
+        return self.protocol
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS items (
+    item_code TEXT PRIMARY KEY,
+    description TEXT NOT NULL DEFAULT '',
+    unit_cost DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weight DOUBLE PRECISION NOT NULL DEFAULT 0
+);
\ No newline at end of file
@@ -17,4 +17,6 @@ DROP TABLE IF EXISTS permissions CASCADE;
 
 DROP TABLE IF EXISTS tasks CASCADE;
 
-DROP TABLE IF EXISTS quotes CASCADE;
\ No newline at end of file
+DROP TABLE IF EXISTS quotes CASCADE;
+
+DROP TABLE IF EXISTS items CASCADE;
\ No newline at end of file
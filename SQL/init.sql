@@ -25,4 +25,6 @@
 \i :PATH/Tables/tasks.sql
 \i :PATH/Tables/tasks_indexes.sql
 
-\i :PATH/Tables/quotes.sql
\ No newline at end of file
+\i :PATH/Tables/quotes.sql
+
+\i :PATH/Tables/items.sql
\ No newline at end of file
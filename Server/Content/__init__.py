@@ -1,10 +1,16 @@
+from .artifact_service import *
 from .auth_service import *
 from .base_service import *
+from .configurator_service import *
 from .decorators import *
+from .dispatcher import *
+from .hub import *
+from .liveness import *
 from .manager import *
 from .middlewares import *
 from .postgre_client import *
 from .resource_service import *
 from .resource_types import *
 from .server import *
+from .uploads import *
 from .websocket_service import *
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from aiohttp.web import (
+    HTTPBadRequest,
+    HTTPConflict,
+    HTTPForbidden,
+    HTTPNotFound,
+    HTTPRequestEntityTooLarge,
+    json_response,
+)
+
+from Common import is_artifact_key, to_json
+
+from .base_service import BaseService
+from .decorators import (
+    BucketType,
+    admin_only,
+    autopilot_only,
+    ratelimit,
+    route,
+    user_only,
+    validate_access,
+)
+from .uploads import (
+    UploadChecksumMismatch,
+    UploadInProgress,
+    UploadOffsetMismatch,
+    UploadStore,
+)
+
+if TYPE_CHECKING:
+    from aiohttp.web import Request, Response
+
+    from .server import Server
+    from .uploads import Upload
+
+__all__ = ("ArtifactService",)
+
+
+class ArtifactService(BaseService):
+    def __init__(self, server: Server, /):
+        super().__init__(server)
+        self.uploads = UploadStore(
+            server.artifacts, max_chunk_size=server.config.upload_chunk_size * 1024
+        )
+
+    async def task_coro(self) -> None:
+        self.uploads.expire(self.server.config.upload_grace)
+
+    def key_from_request(self, request: Request, /) -> str:
+        key = request.match_info["key"]
+
+        if not is_artifact_key(key):
+            raise self.attach_extra_data(
+                HTTPBadRequest(reason="Artifact key must be a SHA-256 hex digest"),
+                {"key": key},
+            )
+
+        # Only artifacts the Autopilot is currently generating can be uploaded
+        if not self.server.apm.expects_artifact(self.token_from_request(request), key):
+            raise self.attach_extra_data(
+                HTTPForbidden(reason="Artifact is not part of a task held by this Autopilot"),
+                {"key": key},
+            )
+
+        return key
+
+    def upload_from_request(self, request: Request, /) -> Upload:
+        key = self.key_from_request(request)
+        upload = self.uploads.get(key)
+
+        if upload is None:
+            raise self.attach_extra_data(
+                HTTPNotFound(reason="Upload does not exist"), {"key": key}
+            )
+
+        return upload
+
+    def upload_response(self, key: str, state: dict[str, int], /) -> Response:
+        complete = state["offset"] == state["size"] and key in self.server.artifacts
+        return json_response({"message": "OK", **state, "complete": complete}, status=200)
+
+    @route("get", "/artifacts/stats")
+    @ratelimit(limit=10, interval=60, bucket_type=BucketType.User)
+    @user_only
+    @admin_only
+    @validate_access
+    async def stats(self, request: Request, /) -> Response:
+        return json_response({"message": "OK", "artifacts": self.server.artifacts.stats()})
+
+    @route("post", "/artifacts/{key}/upload")
+    @ratelimit(limit=60, interval=60, bucket_type=BucketType.Token)
+    @autopilot_only
+    @validate_access
+    async def begin_upload(self, request: Request, /) -> Response:
+        key = self.key_from_request(request)
+        data = await to_json(request)
+
+        size, sha256 = data.get("size"), data.get("sha256")
+        if not isinstance(size, int) or size < 0 or not isinstance(sha256, str):
+            raise HTTPBadRequest(reason="Upload requires an integral size and a SHA-256 digest")
+
+        # Content addressing means an artifact that already exists never needs to be sent again
+        if self.server.artifacts.touch(key, track=False):
+            return self.upload_response(key, {"offset": size, "size": size})
+
+        try:
+            upload = self.uploads.begin(key, size, sha256)
+        except UploadInProgress:
+            raise HTTPConflict(reason="Upload is still being written")
+
+        return await self.progress_response(upload)
+
+    @route("get", "/artifacts/{key}/upload")
+    @ratelimit(limit=60, interval=60, bucket_type=BucketType.Token)
+    @autopilot_only
+    @validate_access
+    async def get_upload(self, request: Request, /) -> Response:
+        upload = self.upload_from_request(request)
+        return self.upload_response(upload.key, upload.to_json())
+
+    @route("patch", "/artifacts/{key}/upload")
+    @ratelimit(limit=600, interval=60, bucket_type=BucketType.Token)
+    @autopilot_only
+    @validate_access
+    async def append_upload(self, request: Request, /) -> Response:
+        upload = self.upload_from_request(request)
+
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            checksum = request.headers["Upload-Checksum"]
+        except (KeyError, ValueError):
+            raise HTTPBadRequest(reason="Missing or invalid upload headers")
+
+        try:
+            await self.uploads.append(upload, offset, checksum, request.content)
+        except UploadOffsetMismatch as error:
+            raise self.attach_extra_data(
+                HTTPConflict(reason="Upload offset mismatch"), {"offset": error.offset}
+            )
+        except UploadChecksumMismatch as error:
+            raise self.attach_extra_data(
+                HTTPBadRequest(reason=str(error).strip(".")), upload.to_json()
+            )
+        except ValueError:
+            raise HTTPRequestEntityTooLarge(
+                max_size=self.uploads.max_chunk_size, actual_size=request.content_length or 0
+            )
+
+        return await self.progress_response(upload)
+
+    async def progress_response(self, upload: Upload, /) -> Response:
+        state = upload.to_json()
+        if state["offset"] < state["size"]:
+            return self.upload_response(upload.key, state)
+
+        try:
+            await self.uploads.complete(upload)
+        except UploadChecksumMismatch as error:
+            raise self.attach_extra_data(
+                HTTPBadRequest(reason=str(error).strip(".")), {"offset": 0, "size": upload.size}
+            )
+
+        return self.upload_response(upload.key, state)
@@ -114,7 +114,9 @@ class AuthService(BaseService):
                 raise ValueError("Invalid session ID.")
 
         except (KeyError, ValueError):
-            session = Session(token_urlsafe(16), user)
+            session = Session(
+                token_urlsafe(16), user, replay_size=self.server.config.ws_replay_size
+            )
             self.server.session_id_to_session[session.id] = session
             log(f"Session issued for {user}. (Session ID: {session.id})")
 
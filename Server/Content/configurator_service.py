@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from asyncio import to_thread
+from math import isfinite
+from typing import TYPE_CHECKING
+
+from aiohttp.web import HTTPBadRequest, json_response
+
+from Common import DOOR_OPTIONS, OptionEngine, to_json
+
+from .base_service import BaseService
+from .decorators import BucketType, ratelimit, route, user_only, validate_access
+
+if TYPE_CHECKING:
+    from aiohttp.web import Request, Response
+
+    from .server import Server
+
+__all__ = ("ConfiguratorService",)
+
+
+class ConfiguratorService(BaseService):
+    def __init__(self, server: Server, /):
+        super().__init__(server)
+        self.options = OptionEngine(config=server.configurator_config)
+
+    async def task_coro(self) -> None:
+        pass
+
+    @route("post", "/configurator/options")
+    @ratelimit(limit=120, interval=60, bucket_type=BucketType.Token)
+    @user_only
+    @validate_access
+    async def query_options(self, request: Request, /) -> Response:
+        data = await to_json(request)
+
+        unknown = data.keys() - DOOR_OPTIONS
+        if unknown:
+            raise self.attach_extra_data(
+                HTTPBadRequest(reason="Unknown door options"), {"options": sorted(unknown)}
+            )
+        elif not all(
+            isinstance(value, int | float) and not isinstance(value, bool)
+            for value in data.values()
+        ):
+            raise HTTPBadRequest(reason="Door options must be numbers")
+        # JSON allows Infinity and NaN, which can never be on the grid
+        elif not all(isinstance(value, int) or isfinite(value) for value in data.values()):
+            raise HTTPBadRequest(reason="Door options must be finite")
+
+        try:
+            # Tables are rebuilt whenever the registered rules change, so this runs off the loop
+            options = await to_thread(self.options.query, data)
+        except (ValueError, OverflowError) as error:
+            raise HTTPBadRequest(reason=str(error).strip("."))
+
+        return json_response({"message": "OK", "options": options}, status=200)
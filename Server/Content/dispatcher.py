@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from asyncio import Semaphore, create_task, gather
+from collections import deque
+from logging import ERROR, WARNING
+from typing import TYPE_CHECKING
+
+from Common import WSAck, log
+
+if TYPE_CHECKING:
+    from asyncio import Task
+    from collections.abc import Callable, Coroutine, Hashable
+    from typing import Any
+
+    from Common import CustomWSMessage, WSEvent
+
+    Handler = Callable[[CustomWSMessage], Coroutine[Any, Any, None]]
+    KeyFunc = Callable[[WSEvent], Hashable]
+
+__all__ = ("MessageDispatcher",)
+
+
+class MessageDispatcher:
+    __slots__ = ("__handler", "__key", "__limit", "__slots", "__lanes", "__tasks", "__depth")
+
+    def __init__(self, handler: Handler, /, *, key: KeyFunc, limit: int):
+        self.__handler = handler
+        self.__key = key
+        self.__limit = limit
+        self.__slots = Semaphore(limit)
+        self.__lanes: dict[Hashable, deque[WSEvent]] = {}
+        self.__tasks: set[Task] = set()
+        self.__depth = 0
+
+    @property
+    def depth(self) -> int:
+        return self.__depth
+
+    @property
+    def full(self) -> bool:
+        return self.__depth >= self.__limit
+
+    async def __handle__(self, message: CustomWSMessage, /) -> None:
+        try:
+            await self.__handler(message)
+        except Exception as error:
+            log(f"Failed to process message {message.id} - {type(error).__name__}.", ERROR)
+
+    async def __drain__(self, key: Hashable, /) -> None:
+        lane = self.__lanes[key]
+
+        try:
+            while lane:
+                try:
+                    await self.__handle__(lane[0])
+                finally:
+                    lane.popleft()
+                    self.__depth -= 1
+                    self.__slots.release()
+        finally:
+            self.__lanes.pop(key, None)
+
+    async def dispatch(self, message: CustomWSMessage, /) -> None:
+        # Acks are cheap and gate the peer's progress, so they skip the queue entirely
+        if isinstance(message, WSAck):
+            await self.__handle__(message)
+            return
+
+        if self.full:
+            log(f"Dispatcher is full ({self.__depth} message(s) queued).", WARNING)
+
+        await self.__slots.acquire()
+        self.__depth += 1
+
+        key = self.__key(message)  # noqa
+        lane = self.__lanes.get(key)
+
+        if lane is not None:
+            lane.append(message)  # noqa
+            return
+
+        self.__lanes[key] = deque((message,))  # noqa
+
+        task = create_task(self.__drain__(key))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def close(self) -> None:
+        tasks = tuple(self.__tasks)
+
+        if self.__depth:
+            log(f"Dispatcher closed with {self.__depth} message(s) unprocessed.", WARNING)
+
+        for task in tasks:
+            task.cancel()
+
+        await gather(*tasks, return_exceptions=True)
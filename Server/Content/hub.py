@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from asyncio import CancelledError, Queue, QueueEmpty, QueueFull, create_task, gather
+from enum import Enum
+from logging import WARNING
+from typing import TYPE_CHECKING
+
+from Common import CustomWSCloseCode, log
+
+if TYPE_CHECKING:
+    from asyncio import Task
+    from collections.abc import Hashable, Iterable, Sequence
+    from typing import Any
+
+    from Common import CustomWSResponse, Session, WSEncoding
+
+    Json = dict[str, Any]
+
+__all__ = ("SlowConsumerPolicy", "Subscriber", "FanOutHub")
+
+
+class SlowConsumerPolicy(Enum):
+    drop = "drop"
+    disconnect = "disconnect"
+
+
+class Subscriber:
+    __slots__ = ("__response", "__queue", "__backlog", "__task")
+
+    def __init__(
+        self, response: CustomWSResponse, /, *, queue_size: int, backlog: Sequence[Json] = ()
+    ):
+        self.__response = response
+        self.__queue: Queue[str | bytes] = Queue(maxsize=queue_size)
+        self.__backlog = backlog
+        self.__task: Task = create_task(self.__send_loop__())
+
+    @property
+    def response(self) -> CustomWSResponse:
+        return self.__response
+
+    @property
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    @property
+    def alive(self) -> bool:
+        return not self.__task.done()
+
+    async def __send_loop__(self) -> None:
+        try:
+            # Replayed events go first, ahead of anything published since they were taken
+            for event in self.__backlog:
+                await self.__response.send_message(event)
+        except CancelledError:
+            raise
+        except Exception as error:
+            log(f"Failed to replay to subscriber - {type(error).__name__}.", WARNING)
+            return
+        finally:
+            self.__backlog = ()
+
+        while True:
+            data = await self.__queue.get()
+
+            try:
+                await self.__response.send_encoded(data)
+            except CancelledError:
+                raise
+            except Exception as error:
+                log(f"Failed to send to subscriber - {type(error).__name__}.", WARNING)
+                return
+
+    def offer(self, data: str | bytes, /, *, policy: SlowConsumerPolicy) -> bool:
+        try:
+            self.__queue.put_nowait(data)
+            return True
+        except QueueFull:
+            pass
+
+        if policy == SlowConsumerPolicy.drop:
+            # Newer events supersede older ones, so make room at the front of the queue
+            try:
+                self.__queue.get_nowait()
+            except QueueEmpty:
+                pass
+            self.__queue.put_nowait(data)
+            return True
+
+        self.cancel()
+        return False
+
+    def cancel(self) -> None:
+        self.__task.cancel()
+
+    async def wait_closed(self) -> None:
+        await gather(self.__task, return_exceptions=True)
+
+
+class FanOutHub:
+    def __init__(self, *, queue_size: int, policy: SlowConsumerPolicy):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.__subscribers: dict[CustomWSResponse, Subscriber] = {}
+        self.__topics: dict[Hashable, set[CustomWSResponse]] = {}
+        self.__closing: set[Task] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self.__subscribers)
+
+    def attach(self, response: CustomWSResponse, /, *, backlog: Sequence[Json] = ()) -> None:
+        if response not in self.__subscribers:
+            self.__subscribers[response] = Subscriber(
+                response, queue_size=self.queue_size, backlog=backlog
+            )
+
+    async def detach(self, response: CustomWSResponse, /) -> None:
+        subscriber = self.__subscribers.pop(response, None)
+
+        for topic in list(self.__topics):
+            self.unsubscribe(topic, response)
+
+        if subscriber is not None:
+            subscriber.cancel()
+            await subscriber.wait_closed()
+
+    def subscribe(self, topic: Hashable, response: CustomWSResponse, /) -> None:
+        self.__topics.setdefault(topic, set()).add(response)
+
+    def unsubscribe(self, topic: Hashable, response: CustomWSResponse, /) -> None:
+        responses = self.__topics.get(topic)
+        if responses is None:
+            return
+
+        responses.discard(response)
+        if not responses:
+            self.__topics.pop(topic, None)
+
+    def broadcast(self, responses: Iterable[CustomWSResponse], event: Json, /) -> int:
+        encoded: dict[WSEncoding, str | bytes] = {}
+        delivered = 0
+
+        for response in responses:
+            subscriber = self.__subscribers.get(response)
+            if subscriber is None:
+                continue
+            elif not subscriber.alive:
+                # Its send loop failed, so nothing offered to it would ever be sent
+                self.__subscribers.pop(response, None)
+                log("Removed a subscriber whose send loop had stopped.", WARNING)
+                continue
+
+            # Each event is encoded at most once per encoding, then shared by every subscriber
+            encoding = response.encoding
+            data = encoded.get(encoding)
+            if data is None:
+                data = encoded[encoding] = encoding.dumps(event)
+
+            if subscriber.offer(data, policy=self.policy):
+                delivered += 1
+            else:
+                self.__subscribers.pop(response, None)
+                self.__close__(response, CustomWSCloseCode.SlowConsumer)
+                log(f"Disconnected slow subscriber ({subscriber.pending} event(s) pending).")
+
+        return delivered
+
+    def disconnect(self, response: CustomWSResponse, code: int, /) -> None:
+        subscriber = self.__subscribers.pop(response, None)
+        if subscriber is not None:
+            subscriber.cancel()
+
+        self.__close__(response, code)
+
+    def __close__(self, response: CustomWSResponse, code: int, /) -> None:
+        # Closing waits on the peer, so it runs in the background but is kept referenced
+        task = create_task(response.close(code=code))
+        self.__closing.add(task)
+        task.add_done_callback(self.__closing.discard)
+
+    def publish(self, topic: Hashable, event: Json, /) -> int:
+        return self.broadcast(tuple(self.__topics.get(topic, ())), event)
+
+    def publish_to_session(self, session: Session, event: Json, /) -> int:
+        # Recorded first, so a connection that drops before receiving it can still replay it
+        session.record_event(event)
+        return self.broadcast(tuple(session.connections.values()), event)
+
+    async def close(self) -> None:
+        subscribers = tuple(self.__subscribers.values())
+        self.__subscribers.clear()
+        self.__topics.clear()
+
+        for subscriber in subscribers:
+            subscriber.cancel()
+
+        await gather(*(subscriber.wait_closed() for subscriber in subscribers))
+        await gather(*self.__closing, return_exceptions=True)
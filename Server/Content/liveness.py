@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from asyncio import CancelledError, create_task, gather, sleep
+from logging import ERROR
+from random import randrange
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from Common import log
+
+if TYPE_CHECKING:
+    from asyncio import Task
+    from typing import Self
+
+    from Common import CustomWSResponse
+
+__all__ = ("LivenessManager",)
+
+
+class LivenessManager:
+    def __init__(self, *, interval: float, timeout: float, slots: int):
+        self.interval = interval
+        self.timeout = timeout
+        self.__wheel: list[set[CustomWSResponse]] = [set() for _ in range(slots)]
+        self.__slot_of: dict[CustomWSResponse, int] = {}
+        self.__cursor = 0
+        self.__task: Task | None = None
+
+    async def __aenter__(self) -> Self:
+        self.__task = create_task(self.run(), name=type(self).__name__)
+        log(
+            f"{type(self).__name__} started with {len(self.__wheel)} slot(s) "
+            f"at an interval of {self.interval} second(s)."
+        )
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        if self.__task is None:
+            return
+        elif not self.__task.done():
+            self.__task.cancel()
+
+        try:
+            await self.__task
+        except CancelledError:
+            log(f"{type(self).__name__} cancelled.")
+        except Exception as error:
+            log(f"{type(self).__name__} raised {type(error).__name__}.", ERROR)
+
+        self.__task = None
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.__slot_of)
+
+    def track(self, response: CustomWSResponse, /) -> None:
+        if response in self.__slot_of:
+            return
+
+        # Random slots spread pings evenly across the interval instead of in bursts
+        slot = randrange(len(self.__wheel))
+        self.__wheel[slot].add(response)
+        self.__slot_of[response] = slot
+
+    def untrack(self, response: CustomWSResponse, /) -> None:
+        slot = self.__slot_of.pop(response, None)
+        if slot is not None:
+            self.__wheel[slot].discard(response)
+
+    async def run(self) -> None:
+        tick = self.interval / len(self.__wheel)
+
+        while True:
+            await sleep(tick)
+            await self.tick()
+
+    async def tick(self) -> None:
+        bucket = self.__wheel[self.__cursor]
+        self.__cursor = (self.__cursor + 1) % len(self.__wheel)
+
+        current_time = monotonic()
+        dead, idle = [], []
+
+        for response in bucket:
+            silence = current_time - response.last_seen
+
+            if response.closed:
+                dead.append(response)
+            elif response.stalled:
+                # Its reader is paused on purpose, so a pong would go unread until it resumes
+                continue
+            elif silence > self.timeout:
+                dead.append(response)
+            elif silence >= self.interval:
+                idle.append(response)
+
+        for response in dead:
+            self.untrack(response)
+
+            # 1006 must never be sent on the wire, so the transport is dropped instead
+            if not response.closed:
+                response.abort()
+
+        if dead:
+            log(f"Aborted {len(dead)} unresponsive WebSocket(s).")
+
+        await gather(*(response.ping() for response in idle), return_exceptions=True)
@@ -1,26 +1,163 @@
 from __future__ import annotations
 
-from asyncio import Condition
+from asyncio import (
+    CancelledError,
+    Condition,
+    Event,
+    TaskGroup,
+    create_task,
+    sleep,
+    to_thread,
+)
+from collections import deque
+from logging import DEBUG, ERROR, WARNING
+from math import ceil
+from time import monotonic
 from typing import TYPE_CHECKING
 
+from aiohttp import WSCloseCode
+
+from Common import build_ws_event, log
+
 if TYPE_CHECKING:
-    from Common import CustomWSResponse, Token
+    from asyncio import Task
+    from collections.abc import Collection, Sequence
+    from typing import Any, Self
+
+    from Common import CustomWSResponse, Door, Token
 
     from .server import Server
 
-__all__ = ("AutopilotInstance", "AutopilotManager")
+    Json = dict[str, Any]
+
+__all__ = ("Subtask", "Job", "Lease", "AutopilotInstance", "AutopilotManager")
+
+
+class Subtask:
+    __slots__ = ("job", "index", "payload", "attempts")
+
+    def __init__(self, job: Job, index: int, payload: Json, /):
+        self.job = job
+        self.index = index
+        self.payload = payload
+        self.attempts = 0
+
+    def __str__(self):
+        return f"task {self.job.id}.{self.index}"
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return self.job.id, self.index
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        # Door batches name their own artifacts; a whole-task subtask produces all of the job's
+        doors = self.payload.get("doors")
+        return self.job.keys if doors is None else tuple(door["key"] for door in doors)
+
+    def to_json(self) -> Json:
+        return {"task_id": self.job.id, "subtask": self.index} | self.payload
+
+
+class Job:
+    __slots__ = ("__id", "__keys", "__subtasks", "__pending", "__error", "__done")
+
+    def __init__(self, task_id: int, keys: Sequence[str], payloads: Sequence[Json], /):
+        self.__id = task_id
+        self.__keys = tuple(keys)
+        self.__subtasks = tuple(Subtask(self, i, payload) for i, payload in enumerate(payloads))
+        self.__pending = set(range(len(payloads)))
+        self.__error: str | None = None
+        self.__done = Event()
+
+        if not self.__pending:
+            self.__done.set()
+
+    def __str__(self):
+        return f"Task {self.__id}"
+
+    @property
+    def id(self) -> int:
+        return self.__id
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return self.__keys
+
+    @property
+    def subtasks(self) -> tuple[Subtask, ...]:
+        return self.__subtasks
+
+    @property
+    def pending_count(self) -> int:
+        return len(self.__pending)
+
+    @property
+    def done(self) -> bool:
+        return self.__done.is_set()
+
+    @property
+    def failed(self) -> bool:
+        return self.__error is not None
+
+    def complete(self, index: int, /) -> None:
+        self.__pending.discard(index)
+        if not self.__pending:
+            self.__done.set()
+
+    def fail(self, reason: str, /) -> None:
+        self.__error = reason
+        self.__done.set()
+
+    async def wait(self) -> tuple[str, ...]:
+        await self.__done.wait()
+
+        if self.__error is not None:
+            raise RuntimeError(f"{self} failed - {self.__error}")
+
+        # Artifacts are content-addressed, so the package is simply its doors' keys in order
+        return self.__keys
+
+
+class Lease:
+    __slots__ = ("subtask", "started", "deadline", "speculative")
+
+    def __init__(self, subtask: Subtask, duration: float, /, *, speculative: bool = False):
+        self.subtask = subtask
+        self.started = monotonic()
+        self.deadline = self.started + duration
+        self.speculative = speculative
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self.started
+
+    @property
+    def expired(self) -> bool:
+        return monotonic() >= self.deadline
+
+    def renew(self, duration: float, /) -> None:
+        self.deadline = monotonic() + duration
 
 
 class AutopilotInstance:
-    __slots__ = ("__token", "__task_id")
+    __slots__ = ("__token", "__capacity", "__leases")
+
+    def __init__(self, token: Token, /, *, capacity: int = 1):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
 
-    def __init__(self, token: Token, /):
         self.__token = token
-        self.__task_id: int | None = None
+        self.__capacity = capacity
+        self.__leases: dict[Subtask, Lease] = {}
 
     def __str__(self):
         return f"Autopilot {self.__token.session.user} (Token ID: {self.__token.id})"
 
+    @property
+    def token(self) -> Token:
+        return self.__token
+
     @property
     def ws(self) -> CustomWSResponse:
         ws = self.__token.session.connections.get(self.__token)
@@ -29,63 +166,407 @@ class AutopilotInstance:
         else:
             return ws
 
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def free_slots(self) -> int:
+        return self.__capacity - len(self.__leases)
+
     @property
     def busy(self) -> bool:
-        return self.__task_id is not None
+        return self.free_slots <= 0
 
     @property
-    def task_id(self) -> int | None:
-        return self.__task_id
+    def tasks(self) -> frozenset[Subtask]:
+        return frozenset(self.__leases)
 
-    def set_task(self, task_id: int, /) -> None:
+    @property
+    def leases(self) -> tuple[Lease, ...]:
+        return tuple(self.__leases.values())
+
+    def get_task(self, task_id: int, index: int, /) -> Subtask | None:
+        for subtask in self.__leases:
+            if subtask.sort_key == (task_id, index):
+                return subtask
+
+    def get_lease(self, subtask: Subtask, /) -> Lease | None:
+        return self.__leases.get(subtask)
+
+    def add_task(self, subtask: Subtask, lease: float, /, *, speculative: bool = False) -> None:
         if self.busy:
             raise RuntimeError(f"{self} is busy.")
+        elif subtask in self.__leases:
+            raise ValueError(f"{self} is already running {subtask}.")
         else:
-            self.__task_id = task_id
+            self.__leases[subtask] = Lease(subtask, lease, speculative=speculative)
 
-    def clear_task(self) -> int:
-        if not self.busy:
-            raise RuntimeError(f"{self} is not busy.")
-        else:
-            last_task_id = self.__task_id
-            self.__task_id = None
-            return last_task_id
+    def remove_task(self, subtask: Subtask, /) -> Lease:
+        try:
+            return self.__leases.pop(subtask)
+        except KeyError:
+            raise ValueError(f"{self} is not running {subtask}.") from None
 
 
 class AutopilotManager:
     def __init__(self, server: Server, /):
         self.__server = server
-        self.__task_queue: list[int] = []
+        self.__task_queue: list[Subtask] = []
+        self.__jobs: dict[int, Job] = {}
         self.__autopilots: dict[Token, AutopilotInstance] = {}
+        self.__durations: deque[float] = deque(maxlen=256)
         self.__condition = Condition()
+        self.__task: Task | None = None
+
+    async def __aenter__(self) -> Self:
+        self.__task = create_task(self.run(), name=type(self).__name__)
+        log(f"{type(self).__name__} started.")
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        if self.__task is None:
+            return
+        elif not self.__task.done():
+            self.__task.cancel()
+
+        try:
+            await self.__task
+        except CancelledError:
+            log(f"{type(self).__name__} cancelled.")
+        except Exception as error:
+            log(f"{type(self).__name__} raised {type(error).__name__}.", ERROR)
+
+        self.__task = None
 
     @property
     def autopilot_count(self) -> int:
         return len(self.__autopilots)
 
-    def queue_task(self, task_id: int, /) -> None:
-        if task_id in self.__task_queue:
-            raise ValueError(f"Task {task_id} is already queued.")
-        else:
-            self.__task_queue.append(task_id)
+    @property
+    def total_slots(self) -> int:
+        return sum(autopilot.capacity for autopilot in self.__autopilots.values())
+
+    @property
+    def free_slots(self) -> int:
+        return sum(autopilot.free_slots for autopilot in self.__autopilots.values())
+
+    @property
+    def queued_count(self) -> int:
+        return len(self.__task_queue)
+
+    @property
+    def p95_duration(self) -> float | None:
+        if len(self.__durations) < self.__server.config.task_speculation_samples:
+            return None
+
+        durations = sorted(self.__durations)
+        return durations[ceil(0.95 * len(durations)) - 1]
+
+    def get_job(self, task_id: int, /) -> Job | None:
+        return self.__jobs.get(task_id)
+
+    def running_on(self, subtask: Subtask, /) -> list[AutopilotInstance]:
+        return [
+            autopilot for autopilot in self.__autopilots.values() if subtask in autopilot.tasks
+        ]
+
+    async def __notify__(self) -> None:
+        async with self.__condition:
+            self.__condition.notify_all()
+
+    async def submit_job(self, job: Job, /) -> Job:
+        if job.id in self.__jobs:
+            raise ValueError(f"{job} is already queued.")
+        elif job.done:
+            log(f"{job} served from the artifact cache.")
+            return job
+
+        self.__jobs[job.id] = job
+        self.__task_queue.extend(job.subtasks)
+        await self.__notify__()
 
-    def get_next_task(self) -> int | None:
+        return job
+
+    def __touch__(self, keys: Collection[str], /) -> list[bool]:
+        # Every lookup is recorded, so the hit rate reflects each door rather than each task
+        return [self.__server.artifacts.touch(key) for key in keys]
+
+    async def queue_task(self, task_id: int, /, *, keys: Collection[str] = ()) -> bool:
+        # Each lookup is a stat and a utime call, which would otherwise block the event loop
+        hits = await to_thread(self.__touch__, keys)
+        payloads = () if hits and all(hits) else ({},)
+
+        job = await self.submit_job(Job(task_id, tuple(keys), payloads))
+        return not job.done
+
+    async def queue_job(self, task_id: int, doors: Sequence[Door], /) -> Job:
+        keys = [door.artifact_key for door in doors]
+        batch_size = max(1, self.__server.config.task_batch_size)
+        hits = await to_thread(self.__touch__, keys)
+
+        # Doors that are already cached are left out, and the rest are scattered in batches
+        missing = [
+            {"key": key, "config": door.config}
+            for key, door, hit in zip(keys, doors, hits)
+            if not hit
+        ]
+        payloads = [
+            {"doors": missing[i : i + batch_size]} for i in range(0, len(missing), batch_size)
+        ]
+
+        job = await self.submit_job(Job(task_id, keys, payloads))
+        log(f"{job} split into {len(payloads)} subtask(s) for {len(doors)} door(s).")
+
+        return job
+
+    def get_next_task(self) -> Subtask | None:
         try:
             return self.__task_queue.pop(0)
         except IndexError:
             return None
 
     def get_autopilot(self) -> AutopilotInstance | None:
-        for autopilot in self.__autopilots.values():
-            if not autopilot.busy:
+        # Prefer the autopilot with the most spare slots so that load is spread evenly
+        return max(
+            (autopilot for autopilot in self.__autopilots.values() if not autopilot.busy),
+            key=lambda autopilot: autopilot.free_slots,
+            default=None,
+        )
+
+    def expects_artifact(self, token: Token, key: str, /) -> bool:
+        autopilot = self.__autopilots.get(token)
+        return autopilot is not None and any(key in task.keys for task in autopilot.tasks)
+
+    def get_autopilot_by_ws(self, ws: CustomWSResponse, /) -> AutopilotInstance | None:
+        for token, autopilot in self.__autopilots.items():
+            if token.session.connections.get(token) is ws:
                 return autopilot
 
-    async def autopilot_connect(self, token: Token, /) -> None: ...
+    def can_dispatch(self) -> bool:
+        return bool(self.__task_queue) and self.get_autopilot() is not None
+
+    async def autopilot_connect(self, token: Token, /, *, capacity: int = 1) -> None:
+        if token in self.__autopilots:
+            raise ValueError(f"Token {token.id} is already registered to an autopilot.")
+
+        autopilot = AutopilotInstance(token, capacity=capacity)
+        self.__autopilots[token] = autopilot
+        log(f"{autopilot} connected with {capacity} slot(s).")
+
+        await self.__notify__()
+
+    async def autopilot_disconnect(self, token: Token, /) -> None:
+        autopilot = self.__autopilots.pop(token, None)
+        if autopilot is None:
+            return
+
+        # Unfinished subtasks go back to the front of the queue, in their original order
+        subtasks = [
+            subtask
+            for subtask in sorted(autopilot.tasks, key=lambda subtask: subtask.sort_key)
+            if not subtask.job.done and not self.running_on(subtask)
+        ]
+        self.__task_queue[:0] = subtasks
+        log(f"{autopilot} disconnected. Requeued {len(subtasks)} task(s).")
+
+        await self.__notify__()
+
+    def __finish__(self, job: Job, /) -> None:
+        self.__jobs.pop(job.id, None)
+
+        # Whatever is still running for the job, such as speculative copies, is no longer needed
+        for autopilot in self.__autopilots.values():
+            for subtask in autopilot.tasks:
+                if subtask.job is job:
+                    autopilot.remove_task(subtask)
+                    self.send_cancel(autopilot, subtask)
+
+        if job.failed:
+            self.__task_queue = [
+                queued for queued in self.__task_queue if queued.job is not job
+            ]
+        else:
+            log(f"{job} completed.")
+
+    def __retry__(self, subtask: Subtask, reason: str, /) -> None:
+        job = subtask.job
+
+        if job.done or self.running_on(subtask):
+            return
+        elif subtask.attempts < self.__server.config.task_max_attempts:
+            # Only the failed subtask is retried; the rest of the job carries on
+            self.__task_queue.insert(0, subtask)
+            log(f"{subtask} {reason}. Retrying.", WARNING)
+        else:
+            job.fail(f"{subtask} {reason} after {subtask.attempts} attempt(s)")
+            log(f"{subtask} {reason}. Giving up on {job}.", ERROR)
+            self.__finish__(job)
+
+    async def autopilot_task_progress(
+        self, token: Token, task_id: int, index: int = 0, /
+    ) -> None:
+        autopilot = self.__autopilots.get(token)
+        subtask = None if autopilot is None else autopilot.get_task(task_id, index)
 
-    async def autopilot_disconnect(self, token: Token, /) -> None: ...
+        if subtask is not None:
+            autopilot.get_lease(subtask).renew(self.__server.config.task_lease)
 
-    async def autopilot_task_done(self, token: Token, /) -> None: ...
+    async def autopilot_task_done(
+        self,
+        token: Token,
+        task_id: int,
+        index: int = 0,
+        /,
+        *,
+        ok: bool = True,
+        retry: bool = True,
+    ) -> None:
+        try:
+            autopilot = self.__autopilots[token]
+        except KeyError:
+            return
+
+        subtask = autopilot.get_task(task_id, index)
+        if subtask is None:
+            # Its lease expired, or another copy already finished it
+            log(
+                f"{autopilot} reported task {task_id}.{index}, which it no longer holds.", DEBUG
+            )
+            return
+
+        lease = autopilot.remove_task(subtask)
+        job = subtask.job
+
+        # A subtask is only done once every artifact it was given has actually been uploaded
+        if ok and not all(key in self.__server.artifacts for key in subtask.keys):
+            self.__retry__(subtask, f"finished on {autopilot} without uploading its artifacts")
+
+        elif ok:
+            self.__durations.append(lease.elapsed)
+            job.complete(index)
+
+            copy = "speculative copy of " if lease.speculative else ""
+            log(f"{autopilot} completed {copy}{subtask} in {lease.elapsed:.3f} seconds.")
+
+            # The first result wins; any other copies of the subtask are cancelled
+            for other in self.running_on(subtask):
+                other.remove_task(subtask)
+                self.send_cancel(other, subtask)
+
+        elif retry:
+            self.__retry__(subtask, f"failed on {autopilot}")
+        else:
+            job.fail(f"{subtask} failed on {autopilot} and cannot be retried")
+            log(f"{autopilot} failed {subtask}. Giving up on {job}.", ERROR)
+
+        if job.done and job.id in self.__jobs:
+            self.__finish__(job)
+
+        await self.__notify__()
 
     async def wait_for_autopilot(self) -> AutopilotInstance:
         async with self.__condition:
             return await self.__condition.wait_for(self.get_autopilot)
+
+    def send_task(self, autopilot: AutopilotInstance, subtask: Subtask, /) -> None:
+        event = build_ws_event(subtask.to_json())
+
+        if not self.__server.hub.broadcast((autopilot.ws,), event):
+            raise RuntimeError(f"{autopilot} is not accepting events.")
+
+        log(f"Dispatched {subtask} to {autopilot}.")
+
+    def send_cancel(self, autopilot: AutopilotInstance, subtask: Subtask, /) -> None:
+        event = build_ws_event(
+            {"task_id": subtask.job.id, "subtask": subtask.index, "cancel": True}
+        )
+
+        try:
+            self.__server.hub.broadcast((autopilot.ws,), event)
+        except RuntimeError:
+            pass
+
+    def reclaim_expired(self) -> None:
+        for autopilot in tuple(self.__autopilots.values()):
+            for lease in autopilot.leases:
+                if not lease.expired:
+                    continue
+
+                autopilot.remove_task(lease.subtask)
+                self.send_cancel(autopilot, lease.subtask)
+                self.__retry__(lease.subtask, f"lease expired on {autopilot}")
+
+    def speculate(self) -> None:
+        threshold = self.p95_duration
+
+        # Queued work always comes first; speculation only uses otherwise idle slots
+        if threshold is None or self.__task_queue:
+            return
+
+        for autopilot in tuple(self.__autopilots.values()):
+            for lease in autopilot.leases:
+                subtask = lease.subtask
+
+                if lease.speculative or lease.elapsed <= threshold or subtask.job.done:
+                    continue
+                elif len(self.running_on(subtask)) > 1:
+                    continue
+
+                target = max(
+                    (
+                        other
+                        for other in self.__autopilots.values()
+                        if not other.busy and subtask not in other.tasks
+                    ),
+                    key=lambda other: other.free_slots,
+                    default=None,
+                )
+                if target is None:
+                    return
+
+                target.add_task(subtask, self.__server.config.task_lease, speculative=True)
+
+                try:
+                    self.send_task(target, subtask)
+                except RuntimeError:
+                    target.remove_task(subtask)
+                    continue
+
+                log(f"{subtask} exceeded the p95 of {threshold:.3f} seconds. Speculating.")
+
+    async def dispatch(self) -> None:
+        while True:
+            async with self.__condition:
+                await self.__condition.wait_for(self.can_dispatch)
+
+                subtask = self.get_next_task()
+                autopilot = self.get_autopilot()
+                autopilot.add_task(subtask, self.__server.config.task_lease)
+                subtask.attempts += 1
+
+            try:
+                self.send_task(autopilot, subtask)
+            except RuntimeError as error:
+                log(f"Failed to dispatch {subtask} - {error}", ERROR)
+                # Also requeues the subtask, and stops this autopilot from being picked again
+                await self.autopilot_disconnect(autopilot.token)
+
+                # Left open, the socket would stay connected with nothing ever sent to it
+                ws = autopilot.token.session.connections.get(autopilot.token)
+                if ws is not None:
+                    self.__server.hub.disconnect(ws, WSCloseCode.TRY_AGAIN_LATER)
+
+    async def watch(self) -> None:
+        while True:
+            await sleep(self.__server.config.task_interval)
+
+            self.reclaim_expired()
+            self.speculate()
+
+            await self.__notify__()
+
+    async def run(self) -> None:
+        async with TaskGroup() as group:
+            group.create_task(self.dispatch())
+            group.create_task(self.watch())
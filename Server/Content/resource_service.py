@@ -4,6 +4,7 @@ from datetime import timedelta
 from typing import TYPE_CHECKING
 
 from aiohttp.web import (
+    FileResponse,
     HTTPBadRequest,
     HTTPConflict,
     HTTPException,
@@ -20,6 +21,7 @@ from Common import (
     ResourceNotOwned,
     Session,
     SessionBound,
+    build_ws_event,
     log,
 )
 
@@ -31,7 +33,7 @@ if TYPE_CHECKING:
     from collections.abc import Callable, Coroutine
     from typing import Any
 
-    from aiohttp.web import Request, Response
+    from aiohttp.web import Request, Response, StreamResponse
 
     from Common import Resource, User
 
@@ -53,6 +55,12 @@ class ResourceService(BaseService):
 
         return quote
 
+    def publish_session(self, session: Session, /) -> None:
+        # Every connection of the Session sees the change, not just the one that asked for it
+        self.server.hub.publish_to_session(
+            session, build_ws_event({"session": session.to_json()})
+        )
+
     def ok_response(
         self,
         resource: Resource,
@@ -161,6 +169,7 @@ class ResourceService(BaseService):
         except SessionBound as error:
             raise self.convert_conflict(error, {"session": session.to_json()})
 
+        self.publish_session(session)
         return self.ok_response(resource)
 
     @route("post", "/resource/{rtype}/{rid}/release")
@@ -179,6 +188,7 @@ class ResourceService(BaseService):
         except ResourceNotOwned as error:
             raise self.convert_conflict(error, {"session": session.to_json()})
 
+        self.publish_session(session)
         return self.ok_response(resource)
 
     @route("get", "/resource/{rtype}/{rid}/preview")
@@ -206,3 +216,33 @@ class ResourceService(BaseService):
         self.acquisition_check(session, resource)
 
         return self.ok_response(resource, version=ResourceJSONVersion.view)
+
+    @route("get", "/resource/{rtype}/{rid}/artifacts/{key}")
+    @ratelimit(limit=60, interval=60, bucket_type=BucketType.User)
+    @user_only
+    @validate_access
+    async def artifact(self, request: Request, /) -> StreamResponse:
+        resource = await self.load_resource(request)
+        session = self.session_from_request(request)
+
+        self.permission_check(session.user, resource, PermissionType.view)
+        # No acquisition check necessary
+
+        key = request.match_info["key"]
+        artifacts = self.server.artifacts
+
+        # Keys can be guessed, so only those of this resource's own doors are served
+        if key not in resource.artifact_keys or not artifacts.touch(key, track=False):
+            raise self.attach_extra_data(
+                HTTPNotFound(reason="Artifact does not exist"), {"key": key}
+            )
+
+        # Sent with sendfile; aiohttp also handles Range, If-Range and strong ETags itself
+        return FileResponse(
+            artifacts.path_for(key),
+            headers={
+                "Content-Type": "application/zip",
+                "Content-Disposition": f'attachment; filename="{key}.zip"',
+                "Cache-Control": "private, max-age=0, must-revalidate",
+            },
+        )
@@ -7,9 +7,13 @@ from typing import TYPE_CHECKING
 from aiohttp import WSCloseCode
 from aiohttp.web import Application, AppRunner, TCPSite
 
-from Common import log
+from Common import ArtifactCache, log
 
+from .artifact_service import ArtifactService
 from .auth_service import AuthService
+from .configurator_service import ConfiguratorService
+from .hub import FanOutHub, SlowConsumerPolicy
+from .liveness import LivenessManager
 from .manager import AutopilotManager
 from .middlewares import middlewares
 from .postgre_client import ServerPostgreSQLClient
@@ -17,7 +21,16 @@ from .resource_service import ResourceService
 from .websocket_service import AutopilotWebSocketService, UserWebSocketService
 
 if TYPE_CHECKING:
-    from Common import PostgresConfig, Resource, ServerAPIConfig, Session, Token, User
+    from Common import (
+        ArtifactCacheConfig,
+        ConfiguratorConfig,
+        PostgresConfig,
+        Resource,
+        ServerAPIConfig,
+        Session,
+        Token,
+        User,
+    )
 
 __all__ = ("Server",)
 
@@ -28,10 +41,14 @@ class Server:
         *,
         config: ServerAPIConfig,
         db_config: PostgresConfig,
+        artifact_config: ArtifactCacheConfig,
+        configurator_config: ConfiguratorConfig,
     ):
         self.config = config
+        self.configurator_config = configurator_config
 
         self.db = ServerPostgreSQLClient(config=db_config)
+        self.artifacts = ArtifactCache(config=artifact_config)
 
         self.app = Application(middlewares=middlewares)
         self.runner: AppRunner | None = None
@@ -39,11 +56,22 @@ class Server:
         self.services = (
             AuthService(self),
             ResourceService(self),
+            ArtifactService(self),
+            ConfiguratorService(self),
             UserWebSocketService(self),
             AutopilotWebSocketService(self),
         )
 
         self.apm = AutopilotManager(self)
+        self.hub = FanOutHub(
+            queue_size=config.ws_send_queue_size,
+            policy=SlowConsumerPolicy(config.ws_slow_consumer_policy),
+        )
+        self.liveness = LivenessManager(
+            interval=config.ws_heartbeat,
+            timeout=config.ws_heartbeat_timeout,
+            slots=config.ws_heartbeat_slots,
+        )
 
         self.key_to_token: dict[str, Token] = {}
         self.user_to_tokens: dict[User, set[Token]] = {}
@@ -63,7 +91,7 @@ class Server:
             log("Service running.")
 
             services = self.services
-            contexts = services + (self.db,)
+            contexts = services + (self.db, self.liveness, self.apm)
             tasks = (service.task for service in services)
 
             async with AsyncExitStack() as stack:
@@ -80,6 +108,7 @@ class Server:
                 for connection in session.connections.values()
             )
             await gather(*coros)
+            await self.hub.close()
             await self.runner.cleanup()
 
         with Runner() as runner:
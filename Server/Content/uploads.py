@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from asyncio import to_thread
+from hashlib import sha256
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from Common import file_sha256, log
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from aiohttp import StreamReader
+
+    from Common import ArtifactCache
+
+__all__ = (
+    "UploadOffsetMismatch",
+    "UploadChecksumMismatch",
+    "UploadInProgress",
+    "Upload",
+    "UploadStore",
+)
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int, /):
+        super().__init__(f"Upload is at offset {offset}.")
+        self.offset: int = offset
+
+
+class UploadChecksumMismatch(Exception):
+    pass
+
+
+class UploadInProgress(Exception):
+    pass
+
+
+class Upload:
+    __slots__ = ("key", "size", "sha256", "path", "updated", "writing")
+
+    def __init__(self, key: str, size: int, sha256: str, path: Path, /):
+        self.key = key
+        self.size = size
+        self.sha256 = sha256
+        self.path = path
+        self.updated = monotonic()
+        self.writing = False
+
+    @property
+    def offset(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def to_json(self) -> dict[str, int]:
+        return {"offset": self.offset, "size": self.size}
+
+
+class UploadStore:
+    def __init__(self, cache: ArtifactCache, /, *, max_chunk_size: int):
+        self.cache = cache
+        self.max_chunk_size = max_chunk_size
+        self.__uploads: dict[str, Upload] = {}
+
+    def __len__(self) -> int:
+        return len(self.__uploads)
+
+    def get(self, key: str, /) -> Upload | None:
+        return self.__uploads.get(key)
+
+    def begin(self, key: str, size: int, sha256: str, /) -> Upload:
+        upload = self.__uploads.get(key)
+
+        if upload is not None and (upload.size, upload.sha256) != (size, sha256):
+            if upload.writing:
+                raise UploadInProgress("Upload is still being written.")
+
+            # The bytes received so far belong to a different artifact, so none can be resumed
+            self.discard(key)
+            upload = None
+
+        if upload is None:
+            # A partial file from a previous server run is resumed; the final digest covers it
+            upload = Upload(key, size, sha256, self.cache.staging / f"{key}.part")
+            self.__uploads[key] = upload
+
+        if upload.offset > size:
+            upload.path.unlink()
+
+        return upload
+
+    def discard(self, key: str, /) -> None:
+        upload = self.__uploads.pop(key, None)
+        if upload is not None:
+            upload.path.unlink(missing_ok=True)
+
+    def expire(self, grace: float, /) -> None:
+        cutoff = monotonic() - grace
+
+        for key, upload in list(self.__uploads.items()):
+            if upload.updated < cutoff:
+                self.discard(key)
+                log(f"Upload {key} expired at offset {upload.offset}.")
+
+    async def append(
+        self, upload: Upload, offset: int, checksum: str, content: StreamReader, /
+    ) -> None:
+        # Concurrent chunks for one upload would interleave, so all but the first are rejected
+        if upload.writing or offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset)
+
+        upload.writing = True
+        digest = sha256()
+        received = 0
+
+        # Only one read buffer is held at a time, however large the chunk or the artifact
+        with upload.path.open("ab") as file:
+            try:
+                async for data in content.iter_chunked(64 * 1024):
+                    received += len(data)
+                    if received > self.max_chunk_size or offset + received > upload.size:
+                        raise ValueError("Chunk is too large.")
+
+                    digest.update(data)
+                    file.write(data)
+
+                if digest.hexdigest() != checksum:
+                    raise UploadChecksumMismatch("Chunk checksum mismatch.")
+
+            except BaseException:
+                file.truncate(offset)
+                raise
+
+            finally:
+                upload.writing = False
+                upload.updated = monotonic()
+
+    async def complete(self, upload: Upload, /) -> None:
+        digest = await to_thread(file_sha256, upload.path)
+
+        if digest != upload.sha256:
+            self.discard(upload.key)
+            raise UploadChecksumMismatch("Artifact checksum mismatch.")
+
+        self.__uploads.pop(upload.key, None)
+        self.cache.put_file(upload.key, upload.path)
+
+        log(f"Upload {upload.key} completed ({upload.size} bytes).")
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 from abc import ABC
+from functools import partial
 from typing import TYPE_CHECKING
 
 from aiohttp import WSCloseCode
-from aiohttp.web import HTTPConflict
-
-from Common import CustomWSResponse, log
+from aiohttp.web import HTTPBadRequest, HTTPConflict
+
+from Common import (
+    CustomWSResponse,
+    WSAck,
+    WSEncoding,
+    WSEvent,
+    WSEventStatus,
+    build_ws_event,
+    log,
+)
 
 from .base_service import BaseService
 from .decorators import (
@@ -17,16 +26,39 @@ from .decorators import (
     user_only,
     validate_access,
 )
+from .dispatcher import MessageDispatcher
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable
+    from typing import Any
+
     from aiohttp.web import Request
 
-    from Common import CustomWSMessage, Token
+    from Common import CustomWSMessage, Session, Token
+
+    from .server import Server
+
+    Json = dict[str, Any]
 
 __all__ = ("BaseWebSocketService", "UserWebSocketService", "AutopilotWebSocketService")
 
 
 class BaseWebSocketService(BaseService, ABC):
+    def __init__(self, server: Server, /):
+        super().__init__(server)
+        self.dispatchers: dict[Token, MessageDispatcher] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(dispatcher.depth for dispatcher in self.dispatchers.values())
+
+    async def task_coro(self) -> None:
+        depth = self.queue_depth
+        if depth:
+            log(
+                f"{depth} WebSocket message(s) queued across {len(self.dispatchers)} connection(s)."
+            )
+
     async def prepare_ws(self, request: Request, token: Token, /) -> CustomWSResponse:
         if token in token.session.connections:
             raise HTTPConflict(reason="Already connected")
@@ -37,13 +69,25 @@ class BaseWebSocketService(BaseService, ABC):
             ratelimited=True,
             limit=config.ws_message_limit,
             interval=config.ws_message_interval,
-            heartbeat=config.ws_heartbeat,
+            byte_limits={
+                WSEvent: (config.ws_event_byte_rate * 1024, config.ws_event_byte_burst * 1024),
+                WSAck: (config.ws_ack_byte_rate * 1024, config.ws_ack_byte_burst * 1024),
+            },
+            autoping=False,
             max_msg_size=config.ws_max_message_size * 1024,
+            protocols=WSEncoding.protocols(),
+            compress=config.ws_compress,
+            compress_threshold=config.ws_compress_threshold,
+            compress_takeover=config.ws_compress_takeover,
         )
         token.session.connections[token] = response
 
         await response.prepare(request)
-        log(f"Opened WebSocket for {token.session.user}. (Token ID: {token.id})")
+        self.server.liveness.track(response)
+        log(
+            f"Opened WebSocket for {token.session.user} using {response.encoding.name}. "
+            f"(Token ID: {token.id})"
+        )
 
         return response
 
@@ -52,6 +96,9 @@ class BaseWebSocketService(BaseService, ABC):
         if response is None:
             return
 
+        self.server.liveness.untrack(response)
+        await self.server.hub.detach(response)
+
         code = response.close_code or WSCloseCode.OK
         await response.close(code=code)
         log(
@@ -63,15 +110,63 @@ class BaseWebSocketService(BaseService, ABC):
         token = self.token_from_request(request)
         response = await self.prepare_ws(request, token)
 
+        dispatcher = MessageDispatcher(
+            partial(self.process_message, response),
+            key=self.ordering_key,
+            limit=self.server.config.ws_dispatch_limit,
+        )
+        self.dispatchers[token] = dispatcher
+
         try:
+            # Taken and attached in one step, so no event falls between the replay and the hub
+            backlog = self.resume_ws(request, token.session)
+            self.server.hub.attach(response, backlog=backlog)
+            await self.on_open(request, token, response)
+
             async for message in response:
-                await self.process_message(response, message)  # noqa
+                # Waiting for a free dispatch slot stops reading, including the peer's pongs
+                with response.stall():
+                    await dispatcher.dispatch(message)  # noqa
 
         finally:
+            await self.on_close(token)
+            self.dispatchers.pop(token, None)
+            await dispatcher.close()
             await self.cleanup_ws(token)
 
         return response
 
+    async def on_open(
+        self, request: Request, token: Token, response: CustomWSResponse, /
+    ) -> None:
+        pass
+
+    async def on_close(self, token: Token, /) -> None:
+        pass
+
+    def resume_ws(self, request: Request, session: Session, /) -> list[Json]:
+        last_event_id = request.query.get("last_event_id")
+        if last_event_id is None:
+            return []
+
+        events = session.events_since(last_event_id)
+
+        if events is None:
+            event = build_ws_event(
+                {"resumed": False},
+                status=WSEventStatus.Error,
+                reason="Unable to resume, State must be resynced",
+            )
+            return [event]
+
+        log(f"Replaying {len(events)} event(s) for {session.user}. (Session ID: {session.id})")
+        return events
+
+    def ordering_key(self, message: WSEvent, /) -> Hashable:
+        # Events that share a key are processed in the order that they were received.
+        # The subprotocol lets Events arrive out of order, so by default none are related.
+        return message.id
+
     async def process_message(
         self,
         response: CustomWSResponse,
@@ -82,9 +177,6 @@ class BaseWebSocketService(BaseService, ABC):
 
 
 class UserWebSocketService(BaseWebSocketService):
-    async def task_coro(self) -> None:
-        pass
-
     @route("get", "/ws/user")
     @ratelimit(limit=10, interval=60, bucket_type=BucketType.Token)
     @user_only
@@ -94,12 +186,68 @@ class UserWebSocketService(BaseWebSocketService):
 
 
 class AutopilotWebSocketService(BaseWebSocketService):
-    async def task_coro(self) -> None:
-        pass
+    def capacity_from_request(self, request: Request, /) -> int:
+        try:
+            capacity = int(request.query.get("capacity", 1))
+        except ValueError:
+            capacity = 0
+
+        if capacity < 1:
+            raise HTTPBadRequest(reason="Capacity must be a positive integral string")
+
+        return capacity
+
+    async def on_open(
+        self, request: Request, token: Token, response: CustomWSResponse, /
+    ) -> None:
+        capacity = self.capacity_from_request(request)
+        await self.server.apm.autopilot_connect(token, capacity=capacity)
+
+    async def on_close(self, token: Token, /) -> None:
+        await self.server.apm.autopilot_disconnect(token)
+
+    def ordering_key(self, message: WSEvent, /) -> Hashable:
+        task_id = message.payload.get("task_id")
+        index = message.payload.get("subtask", 0)
+
+        # Progress and results for one subtask stay in order; different subtasks run in parallel
+        if isinstance(task_id, int) and isinstance(index, int):
+            return task_id, index
+
+        return super().ordering_key(message)
+
+    async def process_message(
+        self,
+        response: CustomWSResponse,
+        message: CustomWSMessage,
+        /,
+    ) -> None:
+        if not isinstance(message, WSEvent):
+            return
+
+        await response.send_ack(message)
+
+        task_id = message.payload.get("task_id")
+        index = message.payload.get("subtask", 0)
+        autopilot = self.server.apm.get_autopilot_by_ws(response)
+
+        if not isinstance(task_id, int) or not isinstance(index, int) or autopilot is None:
+            return
+        elif "progress" in message.payload:
+            await self.server.apm.autopilot_task_progress(autopilot.token, task_id, index)
+        else:
+            await self.server.apm.autopilot_task_done(
+                autopilot.token,
+                task_id,
+                index,
+                ok=message.status == WSEventStatus.Ok,
+                retry=message.payload.get("retry") is not False,
+            )
 
     @route("get", "/ws/autopilot")
     @ratelimit(limit=10, interval=60, bucket_type=BucketType.Token)
     @autopilot_only
     @validate_access
     async def ws_autopilot(self, request: Request, /) -> CustomWSResponse:
+        self.capacity_from_request(request)
         return await self.serve_ws(request)
@@ -1,4 +1,11 @@
-from Common import PostgresConfig, ServerAPIConfig, global_config, setup_logging
+from Common import (
+    ArtifactCacheConfig,
+    ConfiguratorConfig,
+    PostgresConfig,
+    ServerAPIConfig,
+    global_config,
+    setup_logging,
+)
 from Server import Server
 
 setup_logging(__file__)
@@ -8,6 +15,13 @@ if __name__ == "__main__":
     db_config = PostgresConfig(
         **global_config["postgres"] | global_config["server"]["postgres"]
     )
+    artifact_config = ArtifactCacheConfig(**global_config["artifacts"])
+    configurator_config = ConfiguratorConfig(**global_config["configurator"])
 
-    server = Server(config=config, db_config=db_config)
+    server = Server(
+        config=config,
+        db_config=db_config,
+        artifact_config=artifact_config,
+        configurator_config=configurator_config,
+    )
     server.run()